@@ -0,0 +1,95 @@
+import regex as re
+
+from sections import DAY_ABBREVIATIONS
+
+# how many locally ranked schedules the advisor chooses from, and how many it picks
+ADVISOR_CANDIDATES = 15
+ADVISOR_PICKS = 4
+
+ADVISOR_SYSTEM_PROMPT = (
+    "You are an expert academic advisor. Given a numbered list of possible class schedules, "
+    "choose the {picks} best schedules that provide a balance between technical classes, major requirements, "
+    "and the user's stated interests. Courses are listed once under short ids (C1, C2, ...) with their "
+    "code, title and units; each schedule lists its courses by short id with meeting days and times "
+    "({days}).\n\n"
+    "IMPORTANT: ALWAYS INCLUDE AT LEAST ONE NON-TECHNICAL CLASS THAT IS RELATED TO HUMANITIES/SOCIAL SCIENCES.\n"
+    "Return ONLY a JSON list with the numbers of the {picks} best schedules, best first, e.g. {example}. "
+    "No explanation, no markdown, no extra text."
+)
+
+# indices for the reply example, so it never reads like "the top N in order"
+_EXAMPLE_INDICES = [3, 0, 7, 1, 5, 2, 9, 4, 8, 6]
+
+
+def advisor_system_prompt(picks: int = ADVISOR_PICKS) -> str:
+    """The advisor's system prompt, asking for `picks` schedules."""
+    example = (_EXAMPLE_INDICES + list(range(len(_EXAMPLE_INDICES), picks)))[:picks]
+    return ADVISOR_SYSTEM_PROMPT.format(picks=picks, days=" ".join(DAY_ABBREVIATIONS), example=example)
+
+
+"""
+    compact, description-free rendering of the shortlist for the advisor prompt
+"""
+def compact_candidates(candidates: list[list[dict]], courses: dict) -> str:
+    """
+    Args:
+        candidates: schedules as lists of {"id", "days", "start", "end"} meetings
+        courses: course id -> {"name", "title", "units"}
+    """
+    short_ids = {}
+    for schedule in candidates:
+        for meeting in schedule:
+            short_ids.setdefault(meeting["id"], f"C{len(short_ids) + 1}")
+
+    lines = ["Courses:"]
+    for course_id, short_id in short_ids.items():
+        course = courses[course_id]
+        lines.append(f"{short_id} = {course['name']}: {course['title']} ({course['units']} units)")
+
+    lines.append("\nSchedules:")
+    for index, schedule in enumerate(candidates):
+        meetings = ", ".join(
+            f"{short_ids[m['id']]} {m['days']} {m['start']}-{m['end']}" for m in schedule
+        )
+        lines.append(f"{index}: {meetings}")
+    return "\n".join(lines)
+
+
+def parse_advisor_reply(reply: str, num_candidates: int, picks: int = ADVISOR_PICKS) -> list[int]:
+    """
+    Indices picked by the advisor, in order, deduplicated and in range.
+
+    Topped up with the best locally ranked candidates when the reply has
+    fewer than `picks` usable indices (or is not parseable at all).
+    """
+    chosen = []
+    for token in re.findall(r"\d+", reply):
+        index = int(token)
+        if index < num_candidates and index not in chosen:
+            chosen.append(index)
+    for index in range(num_candidates):
+        if len(chosen) >= picks:
+            break
+        if index not in chosen:
+            chosen.append(index)
+    return chosen[:picks]
+
+
+def pick_schedules(client, model: str, interests: str, candidates: list[list[dict]], courses: dict,
+                   picks: int = ADVISOR_PICKS) -> list[int]:
+    """Ask the advisor model for the best `picks` of the (already ranked) candidates."""
+    if len(candidates) <= picks:
+        return list(range(len(candidates)))
+
+    text = (f"User's interests: {interests}\n\n"
+            f"{compact_candidates(candidates, courses)}\n")
+
+    advisor_resp = client.messages.create(
+        model=model,
+        system=advisor_system_prompt(picks),
+        # a few tokens per index, plus the brackets
+        max_tokens=max(64, 8 * picks),
+        messages=[{"role": "user", "content": text}],
+    )
+    advisor_reply = advisor_resp.content[0].text.strip()
+    return parse_advisor_reply(advisor_reply, len(candidates), picks)
@@ -0,0 +1,263 @@
+"""
+    benchmark the scheduling hot paths on a synthetic catalog
+
+    python bench/run.py --courses 5000                     # report
+    python bench/run.py --save-baseline bench/baseline.json
+    python bench/run.py --compare bench/baseline.json      # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, BACKEND_DIR)
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+
+from indexes import CourseNameIndex
+from parsing import parse_constraints_fast
+from scheduler import ConflictGraph, iter_schedules, score_schedule, top_k_schedules
+from sections import build_sections_table, compile_constraints, disallowed_sections
+from stubs import AnthropicStub, ChromaStub, SupabaseStub
+from synthetic import requirement_names, synthetic_courses
+
+CONSTRAINTS = {
+    "Monday": [("00:00", "10:00")], "Tuesday": [("00:00", "10:00")], "Wednesday": [("00:00", "10:00")],
+    "Thursday": [("00:00", "10:00")], "Friday": [("00:00", "23:59")], "Saturday": [], "Sunday": [],
+}
+PHRASES = [
+    "no classes before 10am", "no Fridays and nothing after 5pm", "no classes between 12 and 1pm on weekdays",
+    "I'm interested in machine learning, no mornings", "avoid tuesday mornings",
+]
+USER_INPUT = "I'm interested in machine learning and history, no classes before 10am"
+
+
+def measure(fn, repeat: int, warmup: int = 1, items: int = None) -> dict:
+    """Latency percentiles and throughput over `repeat` runs, then peak memory of one traced run."""
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    # tracing slows everything down, so memory gets its own run
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = np.array(timings)
+    return {
+        "runs": repeat,
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p99_ms": float(np.percentile(timings, 99) * 1000),
+        "ops_per_sec": float(repeat / timings.sum()),
+        "items_per_sec": float(items * repeat / timings.sum()) if items else None,
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def search_pool(sections: pd.DataFrame, pool_size: int, seed: int) -> pd.DataFrame:
+    # one section per course, like the request path after its filters
+    course_ids = sections["course_id"].drop_duplicates().sample(
+        n=min(pool_size, sections["course_id"].nunique()), random_state=seed
+    )
+    pool = sections[sections["course_id"].isin(course_ids)]
+    return pool.drop_duplicates(subset=["course_id"]).reset_index(drop=True)
+
+
+def bench_stages(args) -> dict:
+    courses = synthetic_courses(args.courses, args.sections_per_course, seed=args.seed)
+    df = pd.DataFrame(courses)
+    names = requirement_names(courses, args.requirements, seed=args.seed)
+    sections = build_sections_table(df)
+    name_index = CourseNameIndex(df)
+    pool = search_pool(sections, args.pool, args.seed)
+    course_info = {course_id: {"units": "4"} for course_id in pool["course_id"]}
+    print(f"Catalog: {len(df)} courses, {len(sections)} sections; search pool: {len(pool)} courses")
+
+    def search():
+        graph = ConflictGraph(pool)
+        return top_k_schedules(
+            iter_schedules(graph, args.num_courses, args.workers, limit=args.search_budget),
+            k=50,
+            score=lambda schedule: score_schedule(graph, schedule[0], schedule[1], course_info),
+            max_explored=args.search_budget
+        )
+
+    stages = {
+        "sections_table": (lambda: build_sections_table(df), len(df)),
+        "name_index": (lambda: CourseNameIndex(df), len(df)),
+        "name_filter": (lambda: df.iloc[name_index.resolve(names)], len(names)),
+        "time_filter": (lambda: sections[~disallowed_sections(sections, compile_constraints(CONSTRAINTS))],
+                        len(sections)),
+        "parse_fast": (lambda: [parse_constraints_fast(phrase) for phrase in PHRASES], len(PHRASES)),
+        "search": (search, None),
+    }
+
+    results = {}
+    for name, (fn, items) in stages.items():
+        if args.stages and name not in args.stages:
+            continue
+        repeat = max(3, args.repeat // 5) if name in ("sections_table", "search") else args.repeat
+        results[name] = measure(fn, repeat, items=items)
+    if not args.stages or "end_to_end" in args.stages:
+        end_to_end = bench_end_to_end(args, courses, names)
+        if end_to_end is not None:
+            results["end_to_end"] = end_to_end
+    return results
+
+
+def bench_end_to_end(args, courses: list[dict], names: list[str]):
+    """
+    POST /api/schedule through Flask's test client with every network client stubbed.
+    Needs the app's own dependencies (flask, chromadb, ...); skipped without them.
+    """
+    # app.py reads its settings from config and builds its clients at import time
+    config = types.ModuleType("config")
+    config.SUPABASE_URL, config.SUPABASE_KEY, config.ANTHROPIC_API_KEY = "http://stub", "stub", "stub"
+    config.CATALOG_TTL_SECONDS = 3600
+    config.WARMUP_ENCODE = False
+    config.SCHEDULE_WORKERS = args.workers
+    config.SCHEDULE_SEARCH_BUDGET = args.search_budget
+    sys.modules["config"] = config
+
+    try:
+        import anthropic
+        import embeddings
+        import supabase
+    except ImportError as e:
+        print(f"Skipping end_to_end: {e}")
+        return None
+
+    chroma = ChromaStub([course["id"] for course in courses], latency=args.vector_latency)
+    supabase.create_client = lambda url, key: SupabaseStub(courses, latency=args.db_latency)
+    anthropic.Anthropic = lambda api_key=None: AnthropicStub(latency=args.llm_latency)
+    embeddings.warm_up = lambda embeddings_dir=None, encode=True: None
+    embeddings.ensure_embeddings = lambda *a, **kw: None
+    embeddings.sync_embeddings = lambda *a, **kw: None
+    embeddings.query_embeddings = chroma.query_embeddings
+    embeddings.query_interests = chroma.query_interests
+
+    os.chdir(BACKEND_DIR)
+    try:
+        import app as app_module
+    except ImportError as e:
+        print(f"Skipping end_to_end: {e}")
+        return None
+
+    app_module.catalog_cache.stop()
+    app_module.catalog_cache.refresh()
+    client = app_module.app.test_client()
+    payload = {"major": "Synthetic", "not_completed": names, "user_input": USER_INPUT,
+               "num_courses": args.num_courses}
+
+    def request():
+        response = client.post("/api/schedule", json=payload)
+        assert response.status_code == 200, response.status_code
+
+    # the pipeline prints a lot; keep the report readable
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        return measure(request, max(3, args.repeat // 5))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'stage':<16}{'runs':>6}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'items/s':>12}{'peak MB':>9}"
+    if baseline:
+        header += f"{'p50 vs base':>13}"
+    print(header)
+    for name, r in results.items():
+        items = f"{r['items_per_sec']:.0f}" if r["items_per_sec"] else "-"
+        line = (f"{name:<16}{r['runs']:>6}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['ops_per_sec']:>10.1f}"
+                f"{items:>12}{r['peak_mb']:>9.1f}")
+        if baseline and name in baseline:
+            line += f"{r['p50_ms'] / baseline[name]['p50_ms'] - 1:>+12.0%}"
+        print(line)
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p99_ms", "peak_mb"):
+            # ignore noise below half a millisecond / half a megabyte
+            if r[metric] > max(base[metric], 0.5) * (1 + tolerance):
+                found.append(f"{name}.{metric}: {base[metric]:.2f} -> {r[metric]:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling pipeline on a synthetic catalog.")
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--sections-per-course", type=float, default=1.5)
+    parser.add_argument("--requirements", type=int, default=30, help="required course names per request")
+    parser.add_argument("--pool", type=int, default=30, help="courses given to the combination search")
+    parser.add_argument("--num-courses", type=int, default=4)
+    parser.add_argument("--search-budget", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="*", help="only run these stages")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds per stubbed Supabase call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per stubbed Anthropic call")
+    parser.add_argument("--vector-latency", type=float, default=0.0, help="seconds per stubbed Chroma query")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--save-baseline", help="store results as the baseline")
+    parser.add_argument("--compare", help="baseline to compare against; exits 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = bench_stages(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        if stored.get("params") != vars_for_baseline(args):
+            print(f"Warning: baseline was recorded with {stored.get('params')}")
+
+    print()
+    print_report(results, baseline)
+
+    record = {"params": vars_for_baseline(args), "python": platform.python_version(), "results": results}
+    for path in filter(None, [args.json, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        print(f"\nWrote {path}")
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+
+def vars_for_baseline(args) -> dict:
+    # the workload parameters; results are only comparable when these match
+    keys = ["courses", "sections_per_course", "requirements", "pool", "num_courses", "search_budget", "workers",
+            "seed", "db_latency", "llm_latency", "vector_latency"]
+    return {key: getattr(args, key) for key in keys}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import hashlib
+import time
+from types import SimpleNamespace
+import numpy as np
+
+from vectorstores import match_where
+
+"""
+    in-memory stand-ins for the network clients, so benchmarks measure our code only
+"""
+
+
+class _Query:
+    """Just enough of the postgrest query builder for catalog.py."""
+
+    def __init__(self, rows: list[dict], latency: float):
+        self.rows = rows
+        self.latency = latency
+        self.columns = None
+        self.want_count = False
+        self.window = None
+
+    def select(self, columns: str = "*", count: str = None):
+        if columns != "*":
+            self.columns = [column.strip() for column in columns.split(",")]
+        self.want_count = count is not None
+        return self
+
+    def order(self, column: str):
+        self.rows = sorted(self.rows, key=lambda row: str(row.get(column)))
+        return self
+
+    def gt(self, column: str, value):
+        self.rows = [row for row in self.rows if row.get(column) is not None and row[column] > value]
+        return self
+
+    def in_(self, column: str, values):
+        values = {str(value) for value in values}
+        self.rows = [row for row in self.rows if str(row.get(column)) in values]
+        return self
+
+    def limit(self, n: int):
+        self.window = (0, n - 1)
+        return self
+
+    def range(self, start: int, end: int):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        if self.latency:
+            time.sleep(self.latency)
+        rows = self.rows if self.window is None else self.rows[self.window[0]:self.window[1] + 1]
+        if self.columns is not None:
+            rows = [{column: row.get(column) for column in self.columns} for row in rows]
+        return SimpleNamespace(data=rows, count=len(self.rows) if self.want_count else None)
+
+
+class SupabaseStub:
+    """Serves a fixed Courses table; `latency` seconds are added to every round trip."""
+
+    def __init__(self, courses: list[dict], latency: float = 0.0):
+        self.courses = courses
+        self.latency = latency
+
+    def table(self, name: str) -> _Query:
+        return _Query(self.courses if name == "Courses" else [], self.latency)
+
+
+class AnthropicStub:
+    """
+    Canned replies for the three prompts the app sends (interests, time
+    constraints, advisor), after `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0.0, interests=("machine learning", "history")):
+        self.latency = latency
+        self.interests = list(interests)
+        self.calls = 0
+        self.messages = self
+
+    def create(self, model=None, system="", max_tokens=None, messages=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if "areas of interest" in system:
+            text = repr(self.interests)
+        elif "disallowed" in system:
+            text = repr({"Monday": [("00:00", "09:00")], "Wednesday": [("17:00", "23:59")]})
+        else:
+            text = "[2, 0, 5, 1]"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class ChromaStub:
+    """Deterministic pseudo-nearest-neighbours over the catalog ids, in the Chroma result shape."""
+
+    def __init__(self, course_ids: list, latency: float = 0.0):
+        self.course_ids = [str(i) for i in course_ids]
+        self.latency = latency
+
+    def query_embeddings(self, query_text: str, embeddings_dir: str = None, collection_name: str = "courses",
+                         top_k: int = 5) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        seed = int(hashlib.sha1(str(query_text).encode("utf-8")).hexdigest(), 16)
+        n = len(self.course_ids)
+        ids = [self.course_ids[(seed + i * 7919) % n] for i in range(min(top_k, n))]
+        distances = [0.2 + 0.05 * i for i in range(len(ids))]
+        return {"ids": [ids], "distances": [distances], "metadatas": [[{} for _ in ids]]}
+
+    def query_interests(self, interests: list[str], embeddings_dir: str = None, collection_name: str = "courses",
+                        top_k: int = 5, max_results: int = None, id_col: str = "id", where: dict = None) -> dict:
+        # one simulated round trip for the whole batch, like the real multi-query
+        if self.latency:
+            time.sleep(self.latency)
+        course_ids = self.course_ids
+        if where:
+            # every stub course has a primary section; only the id clause can exclude any
+            columns = {id_col: np.array(course_ids, dtype=object),
+                       "has_primary": np.full(len(course_ids), True, dtype=object)}
+            mask = match_where(where, columns, len(course_ids))
+            course_ids = [course_id for course_id, keep in zip(course_ids, mask) if keep]
+        seen = {}
+        for text in interests:
+            seed = int(hashlib.sha1(str(text).encode("utf-8")).hexdigest(), 16)
+            for rank in range(min(top_k, len(course_ids))):
+                seen.setdefault(course_ids[(seed + rank * 7919) % len(course_ids)], 0.2 + 0.05 * rank)
+        ids = list(seen)[:max_results or top_k * len(interests)]
+        return {"ids": [ids], "distances": [[seen[i] for i in ids]], "scores": [[0.0 for _ in ids]]}
+
+
+def keyword_embed(documents: list[str]) -> list:
+    """Deterministic stand-in for the sentence encoder: counts of a few keywords."""
+    words = ["learning", "history", "art"]
+    return [np.array([document.count(word) for word in words] + [0.01]) for document in documents]
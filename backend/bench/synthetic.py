@@ -0,0 +1,86 @@
+import json
+import random
+
+"""
+    reproducible synthetic catalogs shaped like the berkeleytime payload the scraper stores
+"""
+
+DEPARTMENTS = [
+    ("COMPSCI", "Computer Science"), ("EL ENG", "Electrical Engineering"), ("MATH", "Mathematics"),
+    ("STAT", "Statistics"), ("PHYSICS", "Physics"), ("DATA", "Data Science"), ("ECON", "Economics"),
+    ("HISTORY", "History"), ("PHILOS", "Philosophy"), ("COG SCI", "Cognitive Science"),
+    ("ENGLISH", "English"), ("PSYCH", "Psychology"), ("SOCIOL", "Sociology"), ("MCELLBI", "Molecular and Cell Biology"),
+]
+
+# (wordDays, weight): lecture patterns, roughly as common as on a real schedule
+DAY_PATTERNS = [("MWF", 0.35), ("TuTh", 0.35), ("MW", 0.12), ("M", 0.04), ("Tu", 0.03), ("W", 0.04),
+                ("Th", 0.03), ("F", 0.04)]
+# minutes per meeting for each pattern length
+DURATIONS = {3: [50, 60], 2: [80, 90], 1: [110, 170]}
+
+TOPICS = ["machine learning", "algorithms", "databases", "signal processing", "robotics", "linear algebra",
+          "probability", "quantum mechanics", "macroeconomics", "ancient philosophy", "world history",
+          "neuroscience", "poetry", "social networks", "genetics", "computer vision", "ethics", "optimization"]
+
+
+def synthetic_courses(num_courses: int = 2000, sections_per_course: float = 1.5, seed: int = 0,
+                      first_hour: int = 8, last_hour: int = 20, day_patterns=DAY_PATTERNS) -> list[dict]:
+    """
+    Course dicts with the columns the catalog stores (sectionSet as a JSON string, like Supabase).
+
+    Args:
+        num_courses: catalog size
+        sections_per_course: mean primary sections per course (at least one each)
+        seed: everything is derived from it, so the same arguments give the same catalog
+        first_hour, last_hour: class start times are drawn on a half-hour grid in [first_hour, last_hour)
+        day_patterns: [(wordDays, weight), ...]
+    """
+    rng = random.Random(seed)
+    patterns, weights = zip(*day_patterns)
+    courses = []
+    numbers = {}
+
+    for i in range(num_courses):
+        abbreviation, department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        number = numbers.get(abbreviation, 1)
+        numbers[abbreviation] = number + rng.randint(1, 3)
+        suffix = rng.choice(["", "", "", "A", "B", "L"])
+        course_number = f"C{number}{suffix}" if rng.random() < 0.05 else f"{number}{suffix}"
+        topic = rng.choice(TOPICS)
+
+        edges = []
+        num_sections = max(1, round(rng.expovariate(1 / sections_per_course)))
+        for s in range(num_sections):
+            word_days = rng.choices(patterns, weights)[0]
+            meetings = sum(word_days.count(d) for d in ["M", "Tu", "W", "Th", "F"])
+            start = rng.randrange(first_hour * 60, last_hour * 60, 30)
+            end = min(start + rng.choice(DURATIONS[min(meetings, 3)]), 23 * 60 + 59)
+            edges.append({"node": {
+                "id": f"sec-{i}-{s}",
+                "kind": "Lecture",
+                "instructor": f"Instructor {rng.randrange(num_courses)}",
+                "startTime": f"1900-01-01T{start // 60:02d}:{start % 60:02d}:00",
+                "endTime": f"1900-01-01T{end // 60:02d}:{end % 60:02d}:00",
+                "locationName": f"Hall {rng.randrange(1, 60)}",
+                "wordDays": word_days,
+            }})
+
+        courses.append({
+            "id": f"course-{i}",
+            "abbreviation": abbreviation,
+            "courseNumber": course_number,
+            "title": f"{topic.title()} {number}",
+            "units": rng.choice(["3", "4", "4", "2", "1-4"]),
+            "department": department,
+            "description": f"An introduction to {topic} and its applications in {rng.choice(TOPICS)}.",
+            "sectionSet": json.dumps({"edges": edges}),
+        })
+    return courses
+
+
+def requirement_names(courses: list[dict], count: int = 30, seed: int = 0) -> list[str]:
+    """A requirement list drawn from the catalog, plus a few names that don't resolve."""
+    rng = random.Random(seed)
+    picked = rng.sample(courses, min(count, len(courses)))
+    names = [f"{course['abbreviation']} {course['courseNumber']}" for course in picked]
+    return names + ["COMPSCI 999Z", "NOT A COURSE"]
@@ -0,0 +1,417 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from indexes import CourseNameIndex
+from records import RecordStore
+from sections import build_sections_table
+from snapshot import load_snapshot, read_manifest
+
+MAX_PER_PAGE = 1000
+
+# columns the request pipeline reads: name filter, section/time filters and the
+# final combo details. heavy text (description) is loaded lazily by id
+CATALOG_COLUMNS = ["id", "abbreviation", "courseNumber", "title", "units", "department", "sectionSet"]
+DESCRIPTION_COLUMNS = ["id", "description"]
+MAX_IDS_PER_QUERY = 200
+
+
+def select_columns(columns) -> str:
+    return columns if isinstance(columns, str) else ",".join(columns)
+
+
+"""
+    get all courses from Supabase db
+"""
+def get_courses_from_supabase(client, columns: str = "*", updated_since=None, updated_at_column=None):
+    """
+    Page through the Courses table 1000 rows at a time.
+
+    If updated_since is given, only rows whose updated_at_column is newer are
+    returned (used for delta refreshes of the catalog cache).
+    """
+    all_courses = []
+    start = 0
+
+    while True:
+        # fetch rows [start … start+999]
+        query = client.table("Courses").select(select_columns(columns))
+        if updated_since is not None:
+            query = query.gt(updated_at_column, updated_since)
+        # stable ordering, otherwise rows can shift between pages (as in fetch_page)
+        resp = query.order("id").range(start, start + MAX_PER_PAGE - 1).execute()
+        batch = resp.data
+        if not batch:
+            break
+
+        all_courses.extend(batch)
+        # if we got fewer than MAX_PER_PAGE rows, we’re done
+        if len(batch) < MAX_PER_PAGE:
+            break
+
+        start += MAX_PER_PAGE
+
+    print(f"Fetched {len(all_courses)} total courses")
+
+    return all_courses
+
+
+"""
+    cold-load mode: count the rows, then fetch every .range() window concurrently
+"""
+def count_courses(client) -> int:
+    resp = client.table("Courses").select("id", count="exact").limit(1).execute()
+    return resp.count or 0
+
+
+def fetch_page(client, start: int, page_size: int = MAX_PER_PAGE, columns: str = "*",
+               retries: int = 3, backoff: float = 0.5) -> list[dict]:
+    # windows must come from a stable ordering, otherwise concurrent pages can overlap
+    for attempt in range(retries + 1):
+        try:
+            resp = (
+                client
+                .table("Courses")
+                .select(select_columns(columns))
+                .order("id")
+                .range(start, start + page_size - 1)
+                .execute()
+            )
+            return resp.data or []
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Page at {start} failed ({e}), retrying")
+            time.sleep(backoff * 2 ** attempt)
+
+
+def get_courses_concurrently(client, columns: str = "*", page_size: int = MAX_PER_PAGE,
+                             max_workers: int = 8, retries: int = 3) -> list[dict]:
+    """
+    Fetch the whole Courses table with all pages in flight at once.
+
+    Load time is bounded by the slowest page instead of the sum of pages.
+    Pages are reassembled in range order; if rows were added after the count
+    was taken, the tail is picked up page by page.
+    """
+    total = count_courses(client)
+    starts = list(range(0, total, page_size))
+    if not starts:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(starts))) as pool:
+        pages = list(pool.map(
+            lambda start: fetch_page(client, start, page_size, columns, retries),
+            starts
+        ))
+
+    all_courses = [row for page in pages for row in page]
+
+    start = starts[-1] + page_size
+    while len(pages[-1]) == page_size:
+        pages.append(fetch_page(client, start, page_size, columns, retries))
+        all_courses.extend(pages[-1])
+        start += page_size
+
+    print(f"Fetched {len(all_courses)} total courses ({len(starts)} concurrent pages)")
+
+    return all_courses
+
+
+"""
+    fetch a handful of rows by id, e.g. descriptions for the courses in the final output
+"""
+def get_courses_by_id(client, ids, columns=DESCRIPTION_COLUMNS) -> list[dict]:
+    ids = list(ids)
+    rows = []
+    for i in range(0, len(ids), MAX_IDS_PER_QUERY):
+        resp = (
+            client
+            .table("Courses")
+            .select(select_columns(columns))
+            .in_("id", ids[i:i + MAX_IDS_PER_QUERY])
+            .execute()
+        )
+        rows.extend(resp.data or [])
+    return rows
+
+
+def row_hash(row: dict) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the course catalog at one point in time.
+
+    The cache swaps whole snapshots, so a request that grabbed one keeps a
+    consistent catalog even if a refresh lands mid-request. Treat `courses` and
+    `sections` as read-only; copy before mutating.
+
+    `sections` is the normalized sections table (see sections.py), parsed from
+    sectionSet once per snapshot rather than once per request; `name_index`
+    resolves course codes to rows of `courses` (see indexes.py), and `records`
+    looks up single courses and sections by id (see records.py).
+    """
+
+    def __init__(self, courses: pd.DataFrame, row_hashes: dict, version: int, cursor=None,
+                 changed_ids=None, sections: pd.DataFrame = None):
+        self.courses = courses
+        self.sections = sections if sections is not None else build_sections_table(courses)
+        self.name_index = CourseNameIndex(courses)
+        self.records = RecordStore(courses, self.sections)
+        self.row_hashes = row_hashes    # course id -> hash of the projected row
+        self.version = version
+        self.cursor = cursor            # max updated_at seen, for delta refreshes
+        self.changed_ids = changed_ids  # ids changed since the previous snapshot, None after a full load
+        self.synced_at = time.time()
+
+    def __len__(self):
+        return len(self.courses)
+
+
+class CatalogCache:
+    """
+    Process-wide cache of the Courses table with a TTL and a background refresher.
+
+    Refreshes are deltas when the table has an updated-at column (only rows
+    changed since the last sync are fetched, with a periodic full reload to
+    pick up deletions); otherwise the table is re-read and diffed by row hash
+    so that unchanged catalogs don't produce a new snapshot. Listeners are
+    called with every new snapshot, e.g. to sync the embedding index.
+
+    Full loads fetch all pages concurrently on fetch_workers threads; set it
+    to 1 to page through the table sequentially.
+
+    Snapshots only hold `columns`; descriptions are fetched on demand with
+    get_descriptions and kept in a small LRU. Without an updated-at column,
+    every full_refresh_every-th refresh also fetches the descriptions and
+    diffs them by hash, so a description-only edit still produces a new
+    snapshot (its ids in changed_ids, evicted from the LRU and re-synced by
+    listeners).
+
+    With `snapshot_dir` set, the catalog comes from an offline snapshot built
+    by data/build_snapshot.py instead of Supabase (no client needed): tables
+    are memory-mapped, and each refresh only re-reads the manifest, picking
+    up a rebuilt snapshot without a restart.
+    """
+
+    def __init__(self, client, ttl: float = 300, updated_at_column: str = None,
+                 full_refresh_every: int = 12, fetch_workers: int = 8,
+                 columns: list[str] = CATALOG_COLUMNS, max_descriptions: int = 2000,
+                 snapshot_dir: str = None):
+        self.client = client
+        self.snapshot_dir = snapshot_dir
+        self._snapshot_descriptions = None
+        if snapshot_dir:
+            updated_at_column = None
+        self.ttl = ttl
+        self.updated_at_column = updated_at_column
+        self.full_refresh_every = full_refresh_every
+        self.fetch_workers = fetch_workers
+        self.columns = list(columns)
+        if updated_at_column and updated_at_column not in self.columns:
+            self.columns.append(updated_at_column)
+
+        self._descriptions = OrderedDict()
+        self._description_hashes = None     # id -> hash, from the last full read of descriptions
+        self._descriptions_lock = threading.Lock()
+        self.max_descriptions = max_descriptions
+
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._refreshes = 0
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or (self._thread is None and time.time() - snapshot.synced_at > self.ttl):
+            # cold cache, or no refresher running to keep it fresh
+            snapshot = self.refresh(max_age=self.ttl)
+        return snapshot
+
+    def refresh(self, max_age: float = None) -> CatalogSnapshot:
+        with self._refresh_lock:
+            old = self._snapshot
+            if old is not None and max_age is not None and time.time() - old.synced_at <= max_age:
+                # another thread refreshed while we waited for the lock
+                return old
+
+            use_delta = (
+                old is not None
+                and self.updated_at_column
+                and old.cursor is not None
+                and self._refreshes % self.full_refresh_every != 0
+            )
+            new = self._delta_refresh(old) if use_delta else self._full_refresh(old)
+            self._refreshes += 1
+
+            if new is old:
+                old.synced_at = time.time()
+                return old
+
+            self._snapshot = new
+            self._invalidate_descriptions(new.changed_ids)
+            print(f"Catalog snapshot v{new.version}: {len(new)} courses")
+
+        for listener in self._listeners:
+            try:
+                listener(new)
+            except Exception as e:
+                print(f"Catalog listener failed: {e}")
+        return new
+
+    def _cursor(self, rows, default=None):
+        if not self.updated_at_column:
+            return None
+        stamps = [row.get(self.updated_at_column) for row in rows if row.get(self.updated_at_column)]
+        return max(stamps, default=default)
+
+    def _full_refresh(self, old):
+        if self.snapshot_dir:
+            return self._snapshot_refresh(old)
+        # the row hashes only cover `columns`; periodically diff the descriptions too
+        check_descriptions = (
+            old is not None
+            and not self.updated_at_column
+            and self._refreshes % self.full_refresh_every == 0
+        )
+        columns = self.columns + ["description"] if check_descriptions else self.columns
+        if self.fetch_workers > 1:
+            rows = get_courses_concurrently(self.client, columns, max_workers=self.fetch_workers)
+        else:
+            rows = get_courses_from_supabase(self.client, columns)
+
+        changed_descriptions = set()
+        if check_descriptions:
+            descriptions = {str(row["id"]): row.pop("description", None) or "" for row in rows}
+            changed_descriptions = self._update_description_hashes(descriptions)
+
+        row_hashes = {str(row["id"]): row_hash(row) for row in rows}
+        if old is not None and row_hashes == old.row_hashes and not changed_descriptions:
+            return old
+
+        changed_ids = None
+        if old is not None and row_hashes.keys() == old.row_hashes.keys():
+            # same courses: pass listeners just the ones that changed
+            changed_ids = {i for i, h in row_hashes.items() if old.row_hashes[i] != h} | changed_descriptions
+
+        version = old.version + 1 if old is not None else 1
+        return CatalogSnapshot(pd.DataFrame(rows), row_hashes, version, self._cursor(rows), changed_ids)
+
+    def _update_description_hashes(self, descriptions: dict) -> set:
+        """Store the hashes of a full read of {id: description}; returns the ids whose text changed."""
+        hashes = {i: hashlib.sha1(text.encode("utf-8")).hexdigest() for i, text in descriptions.items()}
+        previous, self._description_hashes = self._description_hashes, hashes
+        if previous is None:
+            return set()
+        return {i for i, h in hashes.items() if previous.get(i, h) != h}
+
+    def _snapshot_refresh(self, old):
+        manifest = read_manifest(self.snapshot_dir)
+        if old is not None and old.cursor == manifest["id"]:
+            return old
+
+        try:
+            manifest, courses, sections, descriptions = load_snapshot(self.snapshot_dir, manifest)
+        except FileNotFoundError:
+            # two builds landed since the manifest was read and pruned its files; the new one is complete
+            manifest, courses, sections, descriptions = load_snapshot(self.snapshot_dir)
+        self._snapshot_descriptions = descriptions
+        version = old.version + 1 if old is not None else 1
+        # the snapshot id stands in for the updated-at cursor; rows aren't hashed
+        return CatalogSnapshot(courses, {}, version, manifest["id"], sections=sections)
+
+    def _delta_refresh(self, old):
+        rows = get_courses_from_supabase(
+            self.client,
+            self.columns,
+            updated_since=old.cursor,
+            updated_at_column=self.updated_at_column
+        )
+        # every returned row was touched, even if only an unprojected column
+        # (e.g. description) changed, so pass them all on to listeners
+        if not rows:
+            return old
+
+        changed_ids = {str(row["id"]) for row in rows}
+        kept = old.courses[~old.courses["id"].astype(str).isin(changed_ids)]
+        changed_df = pd.DataFrame(rows)
+        courses = pd.concat([kept, changed_df], ignore_index=True)
+
+        # only re-parse sectionSet for the changed courses
+        sections = pd.concat([
+            old.sections[~old.sections["course_id"].astype(str).isin(changed_ids)],
+            build_sections_table(changed_df)
+        ], ignore_index=True)
+
+        row_hashes = dict(old.row_hashes)
+        row_hashes.update({str(row["id"]): row_hash(row) for row in rows})
+        return CatalogSnapshot(courses, row_hashes, old.version + 1, self._cursor(rows, old.cursor),
+                               changed_ids, sections)
+
+    def load_descriptions(self) -> pd.DataFrame:
+        """Every course's description (id, description), e.g. to build the embedding index."""
+        if self.snapshot_dir:
+            self.get()
+            return self._snapshot_descriptions.to_frame()
+        rows = get_courses_concurrently(self.client, DESCRIPTION_COLUMNS, max_workers=self.fetch_workers)
+        self._update_description_hashes({str(row["id"]): row.get("description") or "" for row in rows})
+        return pd.DataFrame(rows, columns=DESCRIPTION_COLUMNS)
+
+    def get_descriptions(self, ids) -> dict:
+        """Return {id: description} for ids, fetching only the ones not cached."""
+        if self.snapshot_dir:
+            self.get()
+            return self._snapshot_descriptions.get(ids)
+        ids = [str(i) for i in ids]
+        with self._descriptions_lock:
+            found = {i: self._descriptions[i] for i in ids if i in self._descriptions}
+            for i in found:
+                self._descriptions.move_to_end(i)
+
+        missing = [i for i in dict.fromkeys(ids) if i not in found]
+        if missing:
+            rows = get_courses_by_id(self.client, missing, DESCRIPTION_COLUMNS)
+            fetched = {str(row["id"]): row.get("description") or "" for row in rows}
+            found.update(fetched)
+            with self._descriptions_lock:
+                self._descriptions.update(fetched)
+                while len(self._descriptions) > self.max_descriptions:
+                    self._descriptions.popitem(last=False)
+        return found
+
+    def _invalidate_descriptions(self, changed_ids):
+        with self._descriptions_lock:
+            if changed_ids is None:
+                self._descriptions.clear()
+            else:
+                for i in changed_ids:
+                    self._descriptions.pop(i, None)
+
+    def start(self):
+        """Start the background refresher; the first load happens immediately."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # keep serving the previous snapshot
+                print(f"Catalog refresh failed: {e}")
+            self._stop.wait(self.ttl)
@@ -0,0 +1,76 @@
+"""
+    offline rebuild of the course embedding index, encoding on every core
+
+    python data/build_index.py                                     # from ./catalog_snapshot
+    python data/build_index.py --source supabase --workers 8 --batch-size 128
+    python data/build_index.py --source json --input data/berkeley_courses_2025_fall.json --vector-store numpy
+"""
+import argparse
+import json
+import os
+import sys
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, BACKEND_DIR)
+
+import embeddings
+from catalog import CATALOG_COLUMNS, DESCRIPTION_COLUMNS, get_courses_concurrently
+from embeddings import EMBEDDINGS_DIR, METADATA_COLUMNS, build_index, embedding_rows
+from sections import build_sections_table
+from snapshot import load_snapshot
+
+
+def load_catalog(args):
+    """Returns (courses, sections, descriptions) DataFrames from the chosen source."""
+    if args.source == "snapshot":
+        _, courses, sections, descriptions = load_snapshot(args.snapshot_dir)
+        return courses, sections, descriptions.to_frame()
+
+    if args.source == "supabase":
+        import config
+        from supabase import create_client
+
+        client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+        rows = get_courses_concurrently(client, CATALOG_COLUMNS + ["description"])
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            rows = json.load(f)
+
+    courses = pd.DataFrame(rows)
+    for column in set(CATALOG_COLUMNS + DESCRIPTION_COLUMNS) - set(courses.columns):
+        courses[column] = None
+    courses = courses.drop_duplicates(subset=["id"], keep="last").reset_index(drop=True)
+    descriptions = courses[DESCRIPTION_COLUMNS].assign(description=courses["description"].fillna(""))
+    return courses, build_sections_table(courses), descriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the course embedding index from scratch.")
+    parser.add_argument("--source", choices=["snapshot", "supabase", "json"], default="snapshot")
+    parser.add_argument("--snapshot-dir", default=os.path.join(BACKEND_DIR, "catalog_snapshot"))
+    parser.add_argument("--input", default=os.path.join(BACKEND_DIR, "data", "berkeley_courses_2025_fall.json"))
+    parser.add_argument("--embeddings-dir", default=os.path.join(BACKEND_DIR, EMBEDDINGS_DIR))
+    parser.add_argument("--vector-store", default=embeddings.VECTOR_STORE, help="chroma or numpy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="encoder processes")
+    parser.add_argument("--batch-size", type=int, default=256, help="descriptions per encode call")
+    parser.add_argument("--write-batch", type=int, default=4096, help="vectors per bulk write")
+    args = parser.parse_args()
+
+    embeddings.set_vector_store(args.vector_store)
+    courses, sections, descriptions = load_catalog(args)
+    df = embedding_rows(courses, sections, descriptions)
+    print(f"Encoding {len(df)} descriptions with {args.workers} workers, batches of {args.batch_size}")
+
+    def progress(written, seconds):
+        print(f"  {written}/{len(df)} written ({written / seconds:.0f} docs/sec)")
+
+    stats = build_index(df, "id", "description", args.embeddings_dir, metadata_cols=METADATA_COLUMNS,
+                        batch_size=args.batch_size, workers=args.workers, write_batch=args.write_batch,
+                        progress=progress)
+    print(f"Indexed {stats['documents']} documents in {stats['seconds']:.1f}s "
+          f"({stats['docs_per_sec']:.0f} docs/sec) into {args.vector_store} at {args.embeddings_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+    build the offline catalog snapshot the API can serve with CATALOG_SOURCE = "snapshot"
+
+    python data/build_snapshot.py                                   # from the scraper's JSON
+    python data/build_snapshot.py --supabase                        # from the Courses table
+    python data/build_snapshot.py --input courses.json --out catalog_snapshot
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, BACKEND_DIR)
+
+from catalog import CATALOG_COLUMNS, DESCRIPTION_COLUMNS, get_courses_concurrently
+from sections import build_sections_table
+from snapshot import write_snapshot
+
+COURSE_COLUMNS = [column for column in CATALOG_COLUMNS if column != "sectionSet"]
+
+
+def load_json(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_supabase() -> list[dict]:
+    import config
+    from supabase import create_client
+
+    client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+    return get_courses_concurrently(client, CATALOG_COLUMNS + ["description"])
+
+
+def build(courses: list[dict], out_dir: str) -> dict:
+    df = pd.DataFrame(courses)
+    for column in set(CATALOG_COLUMNS + DESCRIPTION_COLUMNS) - set(df.columns):
+        df[column] = None
+    df = df.drop_duplicates(subset=["id"], keep="last").reset_index(drop=True)
+
+    # sectionSet is only needed to flatten the sections; it isn't stored
+    sections = build_sections_table(df)
+    descriptions = df[DESCRIPTION_COLUMNS].assign(description=df["description"].fillna(""))
+    return write_snapshot(out_dir, df[COURSE_COLUMNS], sections, descriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the catalog as memory-mappable Arrow tables.")
+    parser.add_argument("--input", default=os.path.join(BACKEND_DIR, "data", "berkeley_courses_2025_fall.json"),
+                        help="scraper output (JSON array of courses)")
+    parser.add_argument("--supabase", action="store_true", help="read the Courses table instead of --input")
+    parser.add_argument("--out", default=os.path.join(BACKEND_DIR, "catalog_snapshot"))
+    args = parser.parse_args()
+
+    start = time.time()
+    courses = load_supabase() if args.supabase else load_json(args.input)
+    manifest = build(courses, args.out)
+    print(f"Snapshot {manifest['id']} in {args.out}: {manifest['rows']['courses']} courses, "
+          f"{manifest['rows']['sections']} sections ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
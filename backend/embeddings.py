@@ -0,0 +1,482 @@
+import hashlib
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from vectorstores import VECTOR_STORES
+
+# bump whenever the embedding model or the embedded text changes, so a fresh
+# collection is built next to the old one instead of mixing incompatible vectors
+INDEX_VERSION = 2
+EMBEDDINGS_DIR = "./embeddings"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "chroma" (PersistentClient) or "numpy" (memory-mapped matrix); see vectorstores.py
+VECTOR_STORE = "chroma"
+# stored with every course embedding so queries can prefilter inside the index
+# (see course_metadata); has_primary is what the schedulable prefilter checks
+METADATA_COLUMNS = ["department", "units", "has_primary", "days"]
+# reciprocal-rank fusion constant; larger values flatten the gap between ranks
+RRF_K = 60
+
+# catalog fingerprint last synced into each collection by this process
+_synced_fingerprints = {}
+
+# process-wide embedding model and vector stores (one per worker process)
+_init_lock = threading.Lock()
+_embedding_fn = None
+_stores = {}
+_ready = threading.Event()
+
+
+class SentenceTransformerFunction:
+    """Same model and output as Chroma's embedding function, for when chromadb isn't installed."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def __call__(self, texts: list[str]) -> list[np.ndarray]:
+        return list(self.model.encode(list(texts), convert_to_numpy=True))
+
+
+"""
+    shared embedding model and vector store, loaded once per process
+"""
+def get_embedding_function():
+    global _embedding_fn
+    if _embedding_fn is None:
+        with _init_lock:
+            if _embedding_fn is None:
+                try:
+                    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                    _embedding_fn = SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+                except ImportError:
+                    _embedding_fn = SentenceTransformerFunction(EMBEDDING_MODEL)
+    return _embedding_fn
+
+
+def set_vector_store(name: str):
+    global VECTOR_STORE
+    if name not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector store {name!r}, expected one of {sorted(VECTOR_STORES)}")
+    VECTOR_STORE = name
+
+
+def get_store(embeddings_dir: str = EMBEDDINGS_DIR, collection_name: str = "courses"):
+    """The versioned collection in the configured backend (VECTOR_STORE)."""
+    key = (VECTOR_STORE, embeddings_dir, versioned_name(collection_name))
+    store = _stores.get(key)
+    if store is None:
+        embedding_fn = get_embedding_function()
+        with _init_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = VECTOR_STORES[VECTOR_STORE](embeddings_dir, key[2], embedding_fn)
+                _stores[key] = store
+    return store
+
+
+def warm_up(embeddings_dir: str = EMBEDDINGS_DIR, encode: bool = True):
+    """
+    Load the embedding model and vector store into this process.
+
+    With encode=True a throwaway sentence is embedded as well, so lazy
+    initialization inside the model (tokenizer, first forward pass) is paid
+    here instead of by the first user request.
+    """
+    embedding_fn = get_embedding_function()
+    get_store(embeddings_dir)
+    if encode:
+        embedding_fn(["warm up"])
+    _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+"""
+    helpers for the versioned, content-addressed index
+"""
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def row_hash(text: str, metadata: dict = None) -> str:
+    # metadata is part of the hash, so a metadata-only change is re-upserted too
+    if not metadata:
+        return content_hash(text)
+    return content_hash(text + "\0" + json.dumps(metadata, sort_keys=True, default=str))
+
+
+def versioned_name(collection_name: str) -> str:
+    return f"{collection_name}_v{INDEX_VERSION}"
+
+
+def unique_ids(raw_ids: list[str]) -> list[str]:
+    # ensure uniqueness by appending a counter to duplicates
+    ids = []
+    seen = {}
+    for raw_id in raw_ids:
+        if raw_id in seen:
+            seen[raw_id] += 1
+            ids.append(f"{raw_id}_{seen[raw_id]}")
+        else:
+            seen[raw_id] = 0
+            ids.append(raw_id)
+    return ids
+
+
+"""
+    bring a collection in line with a df, embedding only new or changed rows
+"""
+def sync_embeddings(
+    df: pd.DataFrame,
+    id_col: str,
+    text_col: str,
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    prune: bool = True,
+    metadata_cols: list[str] = None
+) -> dict:
+    """
+    Incrementally update the versioned collection of course embeddings.
+
+    Every stored embedding carries the content hash of the text it was built
+    from, so only rows whose text changed (or that are new) are re-embedded and
+    rows that disappeared from the catalog are deleted. Pass prune=False when
+    df only holds the changed rows rather than the whole catalog.
+
+    Args:
+        df: DataFrame containing at least id_col and text_col
+        id_col: name of the column to use as unique identifier
+        text_col: name of the column containing text to embed
+        embeddings_dir: directory of the vector store
+        collection_name: base name of the collection
+        prune: delete stored rows that are not in df
+        metadata_cols: df columns stored as metadata with each embedding
+
+    Returns a dict with the number of 'upserted', 'deleted' and 'unchanged' rows.
+    """
+    store = get_store(embeddings_dir, collection_name)
+
+    raw_ids = df[id_col].astype(str).tolist()
+    ids = unique_ids(raw_ids)
+    texts = df[text_col].astype(str).tolist()
+    metadata = df[metadata_cols].to_dict("records") if metadata_cols else [{} for _ in ids]
+    hashes = [row_hash(text, meta) for text, meta in zip(texts, metadata)]
+
+    # diff and write under the store's lock: another worker syncing the same
+    # catalog waits, then finds these rows unchanged instead of re-embedding them
+    with store.locked():
+        stored = {
+            stored_id: (metadata or {}).get("hash")
+            for stored_id, metadata in store.stored_metadata().items()
+        }
+
+        changed = [i for i, (uid, h) in enumerate(zip(ids, hashes)) if stored.get(uid) != h]
+        removed = list(set(stored) - set(ids)) if prune else []
+
+        if changed:
+            store.upsert(
+                ids=[ids[i] for i in changed],
+                documents=[texts[i] for i in changed],
+                # keep original id_col value in metadata
+                metadatas=[{**metadata[i], id_col: raw_ids[i], "hash": hashes[i]} for i in changed]
+            )
+        if removed:
+            store.delete(removed)
+
+    return {
+        "upserted": len(changed),
+        "deleted": len(removed),
+        "unchanged": len(ids) - len(changed)
+    }
+
+
+"""
+    cheap per-request check that only touches the index when the catalog changed
+"""
+def ensure_embeddings(
+    df: pd.DataFrame,
+    id_col: str,
+    text_col: str,
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    metadata_cols: list[str] = None
+):
+    metadata = df[metadata_cols].to_dict("records") if metadata_cols else [None] * len(df)
+    fingerprint = content_hash("\n".join(
+        f"{row_id}:{row_hash(text, meta)}"
+        for row_id, text, meta in zip(df[id_col].astype(str), df[text_col].astype(str), metadata)
+    ))
+    key = (embeddings_dir, versioned_name(collection_name))
+    if _synced_fingerprints.get(key) == fingerprint:
+        return None
+
+    stats = sync_embeddings(df, id_col, text_col, embeddings_dir, collection_name, metadata_cols=metadata_cols)
+    _synced_fingerprints[key] = fingerprint
+    print(f"Synced embeddings index: {stats}")
+    return stats
+
+
+"""
+    create embeddings for courses in a df and store them in a fresh collection
+"""
+def create_embeddings(
+    df: pd.DataFrame,
+    id_col: str,
+    text_col: str,
+    # TODO: add department and class name
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    metadata_cols: list[str] = None
+):
+    """
+    Rebuild the versioned collection of course embeddings from scratch.
+
+    Only needed for offline rebuilds; request handlers go through
+    ensure_embeddings, which updates the existing index incrementally.
+
+    Args:
+        df: DataFrame containing at least id_col and text_col
+        id_col: name of the column to use as unique identifier
+        text_col: name of the column containing text to embed
+        embeddings_dir: directory of the vector store
+        collection_name: base name of the collection
+        metadata_cols: df columns stored as metadata with each embedding
+    """
+    # Remove existing collection if present
+    get_store(embeddings_dir, collection_name).reset()
+
+    _synced_fingerprints.pop((embeddings_dir, versioned_name(collection_name)), None)
+    return sync_embeddings(df, id_col, text_col, embeddings_dir, collection_name, metadata_cols=metadata_cols)
+
+
+"""
+    per-course metadata for the index and the schedulable-course prefilter
+"""
+def course_metadata(courses: pd.DataFrame, sections: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per course: department, units, has_primary (the course has a
+    timed primary section) and days (bitmask of the weekdays any of those
+    sections meets on), indexed by str(course id).
+    """
+    days = sections.groupby(sections["course_id"].astype(str))["days"].agg(
+        lambda masks: int(np.bitwise_or.reduce(masks.to_numpy()))
+    )
+    ids = courses["id"].astype(str)
+    return pd.DataFrame({
+        "department": courses["department"].fillna("").astype(str).to_numpy(),
+        "units": courses["units"].fillna("").astype(str).to_numpy(),
+        "has_primary": ids.isin(days.index).to_numpy(),
+        "days": ids.map(days).fillna(0).astype(int).to_numpy(),
+    }, index=ids.to_numpy())
+
+
+def embedding_rows(courses: pd.DataFrame, sections: pd.DataFrame, df_text: pd.DataFrame) -> pd.DataFrame:
+    """df_text (id, description) joined with course_metadata, ready for sync_embeddings."""
+    metadata = course_metadata(courses, sections).reindex(df_text["id"].astype(str))
+    metadata = metadata.fillna({"department": "", "units": "", "has_primary": False, "days": 0})
+    return pd.concat([df_text.reset_index(drop=True), metadata.reset_index(drop=True)], axis=1).astype(
+        {"has_primary": bool, "days": int}
+    )
+
+
+def schedulable_filter(allowed_ids, all_ids, id_col: str = "id") -> dict:
+    """
+    `where` clause matching courses that have a primary section and are in
+    allowed_ids. Chroma's where has no bitwise operators, so time constraints
+    are applied to the sections table first and pushed down as an id list:
+    $in for the allowed ids or $nin for the rest, whichever is shorter.
+    """
+    allowed = {str(i) for i in allowed_ids}
+    excluded = [str(i) for i in all_ids if str(i) not in allowed]
+    if len(excluded) < len(allowed):
+        id_clause = {id_col: {"$nin": excluded}} if excluded else None
+    else:
+        id_clause = {id_col: {"$in": sorted(allowed)}}
+    if id_clause is None:
+        return {"has_primary": True}
+    return {"$and": [{"has_primary": True}, id_clause]}
+
+
+def query_embeddings(
+    query_text: str,
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    top_k: int = 5
+) -> dict:
+    """
+    Query the embeddings collection for the most relevant courses.
+
+    Returns a dict with keys 'ids', 'distances'.
+    """
+    vectors = get_embedding_function()([query_text])
+    return get_store(embeddings_dir, collection_name).query(vectors, n_results=top_k)
+
+
+"""
+    several interests in one round trip: one batched encode, one multi-query, fused by rank
+"""
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = RRF_K) -> dict:
+    """{id: sum over rankings of 1 / (k + rank)}, in order of first appearance."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+def query_interests(
+    interests: list[str],
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    top_k: int = 5,
+    max_results: int = None,
+    id_col: str = "id",
+    where: dict = None
+) -> dict:
+    """
+    Query the collection once for all of the user's interests.
+
+    Every interest gets its own top_k neighbours; the lists are merged with
+    reciprocal-rank fusion and deduplicated by course id (the id_col stored
+    in each embedding's metadata), so a course close to several interests
+    ranks first and every interest is represented near the top.
+
+    Returns the same shape as query_embeddings for a single query: 'ids' and
+    'distances' (the smallest distance to any interest) plus the fused
+    'scores', best first, at most max_results (default top_k per interest).
+
+    `where` is applied inside the index (e.g. schedulable_filter), so the
+    neighbours returned already satisfy it.
+    """
+    interests = [text for text in interests if text]
+    if not interests:
+        return {"ids": [[]], "distances": [[]], "scores": [[]]}
+
+    vectors = get_embedding_function()(interests)
+    results = get_store(embeddings_dir, collection_name).query(vectors, n_results=top_k, where=where)
+
+    rankings = []
+    distance = {}
+    for stored_ids, metadatas, distances in zip(results["ids"], results["metadatas"], results["distances"]):
+        ranking = []
+        for stored_id, metadata, dist in zip(stored_ids, metadatas, distances):
+            course_id = str((metadata or {}).get(id_col, stored_id))
+            if course_id in distance:
+                distance[course_id] = min(distance[course_id], dist)
+            else:
+                distance[course_id] = dist
+            if course_id not in ranking:
+                ranking.append(course_id)
+        rankings.append(ranking)
+
+    fused = reciprocal_rank_fusion(rankings)
+    ranked = sorted(fused, key=lambda course_id: -fused[course_id])[:max_results or top_k * len(interests)]
+    return {
+        "ids": [ranked],
+        "distances": [[distance[course_id] for course_id in ranked]],
+        "scores": [[fused[course_id] for course_id in ranked]]
+    }
+
+
+"""
+    offline full rebuild: encode in parallel worker processes, write in bulk
+"""
+def _init_encoder(threads: int):
+    # keep each worker's torch from spreading over every core
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _encode_batch(texts: list[str]) -> np.ndarray:
+    return np.asarray(get_embedding_function()(texts), dtype=np.float32)
+
+
+def encode_parallel(texts: list[str], batch_size: int = 256, workers: int = 1):
+    """
+    Yield embeddings for texts batch by batch, in order.
+
+    With workers > 1 the batches are spread over that many spawned processes,
+    each loading the model once and using an equal share of the cores.
+    """
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if workers <= 1:
+        for batch in batches:
+            yield _encode_batch(batch)
+        return
+
+    threads = max(1, (multiprocessing.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_encoder,
+        initargs=(threads,)
+    ) as pool:
+        yield from pool.map(_encode_batch, batches)
+
+
+def build_index(
+    df: pd.DataFrame,
+    id_col: str,
+    text_col: str,
+    embeddings_dir: str,
+    collection_name: str = "courses",
+    metadata_cols: list[str] = None,
+    batch_size: int = 256,
+    workers: int = 1,
+    write_batch: int = 4096,
+    progress=None
+) -> dict:
+    """
+    Rebuild the versioned collection from scratch, like create_embeddings,
+    but encode with encode_parallel and write precomputed vectors in bulk
+    (write_batch rows per upsert). Rows carry the same hashes sync_embeddings
+    uses, so the server sees the rebuilt index as up to date.
+
+    progress, if given, is called with (documents written, elapsed seconds).
+    Returns a dict with 'documents', 'seconds' and 'docs_per_sec'.
+    """
+    store = get_store(embeddings_dir, collection_name)
+    store.reset()
+    _synced_fingerprints.pop((embeddings_dir, versioned_name(collection_name)), None)
+
+    raw_ids = df[id_col].astype(str).tolist()
+    ids = unique_ids(raw_ids)
+    texts = df[text_col].astype(str).tolist()
+    metadata = df[metadata_cols].to_dict("records") if metadata_cols else [{} for _ in ids]
+    metadatas = [
+        {**meta, id_col: raw_id, "hash": row_hash(text, meta)}
+        for raw_id, text, meta in zip(raw_ids, texts, metadata)
+    ]
+
+    start = time.perf_counter()
+    written = 0
+    pending = []
+
+    def flush():
+        nonlocal written, pending
+        vectors = np.vstack(pending)
+        end = written + len(vectors)
+        store.upsert(ids[written:end], texts[written:end], metadatas[written:end], embeddings=vectors)
+        written, pending = end, []
+        if progress is not None:
+            progress(written, time.perf_counter() - start)
+
+    for vectors in encode_parallel(texts, batch_size, workers):
+        pending.append(vectors)
+        if sum(len(batch) for batch in pending) >= write_batch:
+            flush()
+    if pending:
+        flush()
+
+    seconds = time.perf_counter() - start
+    return {"documents": written, "seconds": seconds, "docs_per_sec": written / seconds if seconds else 0.0}
@@ -0,0 +1,75 @@
+from functools import lru_cache
+import pandas as pd
+import regex as re
+
+# departments that list the same courses under another name, tried (in order)
+# when a requirement doesn't match its own department
+DEPT_ALIASES = {
+    "EL ENG": ["EECS"],
+    "COMPSCI": ["EECS"],
+    "EECS": ["EL ENG", "COMPSCI"],
+}
+
+COURSE_NAME_RE = re.compile(r"^\s*([A-Z][A-Z&,.\s]*?)\s+([A-Z]{0,2}\d+[A-Z]*)\s*$", re.IGNORECASE)
+
+
+"""
+    normalization shared by the index and the lookups
+"""
+def normalize_dept(dept: str) -> str:
+    return " ".join(str(dept).upper().split())
+
+
+def normalize_number(number: str) -> str:
+    return str(number).strip().upper()
+
+
+def strip_cross_listing(number: str) -> str:
+    # "C106A" -> "106A"; cross-listed courses share the number without the C
+    return number[1:] if number[:1] == "C" and number[1:2].isdigit() else number
+
+
+@lru_cache(maxsize=4096)
+def parse_course_name(course_name: str):
+    """'EL ENG C106A' -> ('EL ENG', 'C106A'), or None if malformed."""
+    match = COURSE_NAME_RE.match(course_name)
+    if not match:
+        return None
+    return normalize_dept(match.group(1)), normalize_number(match.group(2))
+
+
+class CourseNameIndex:
+    """
+    Maps normalized (abbreviation, courseNumber) to row positions in a catalog df.
+
+    Built once per catalog snapshot, so resolving a whole requirement list is
+    a batch of dictionary lookups. A second map keyed by the number without
+    its cross-listing "C" lets "EL ENG C128" and "EL ENG 128" find each other.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.exact = {}
+        self.loose = {}
+        depts = df["abbreviation"].fillna("").map(normalize_dept)
+        numbers = df["courseNumber"].fillna("").map(normalize_number)
+        for position, (dept, number) in enumerate(zip(depts, numbers)):
+            self.exact.setdefault((dept, number), []).append(position)
+            self.loose.setdefault((dept, strip_cross_listing(number)), []).append(position)
+
+    def lookup(self, course_name: str) -> list[int]:
+        parsed = parse_course_name(course_name)
+        if parsed is None:
+            return []
+        dept, number = parsed
+
+        for candidate in [dept] + DEPT_ALIASES.get(dept, []):
+            positions = self.exact.get((candidate, number)) or self.loose.get((candidate, strip_cross_listing(number)))
+            if positions:
+                return positions
+        return []
+
+    def resolve(self, course_names: list[str]) -> list[int]:
+        """Row positions for all names, deduplicated, in request order."""
+        return list(dict.fromkeys(
+            position for course_name in course_names for position in self.lookup(course_name)
+        ))
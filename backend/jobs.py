@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Job:
+    """One queued request; status goes queued -> running -> done | failed."""
+
+    def __init__(self, key: str, payload):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = "queued"
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def set_stage(self, stage: str):
+        self.stage = stage
+
+    def to_dict(self, cached: bool = False) -> dict:
+        body = {"job_id": self.id, "status": self.status, "stage": self.stage, "cached": cached}
+        if self.status == "done":
+            body["result"] = self.result
+        elif self.status == "failed":
+            body["error"] = self.error
+        return body
+
+
+class JobQueue:
+    """
+    Bounded in-process job runner with result caching.
+
+    `run(payload, set_stage)` executes on one of `workers` daemon threads.
+    At most `max_queued` jobs wait for a worker; beyond that submit raises
+    queue.Full so the caller can shed load instead of piling up threads.
+
+    Jobs are keyed by `key(payload)`: submitting a payload whose key matches
+    a queued, running or finished (within `result_ttl`) job returns that job
+    instead of doing the work again. Failed jobs are retried on resubmit.
+    """
+
+    def __init__(self, run, key, workers: int = 2, max_queued: int = 16,
+                 result_ttl: float = 600, max_jobs: int = 1000):
+        self.run = run
+        self.key = key
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+        self._by_key = {}           # request key -> job id
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, payload):
+        """Returns (job, created); raises queue.Full when the queue is at capacity."""
+        self.start()
+        key = self.key(payload)
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(self._by_key.get(key))
+            if job is not None and job.status != "failed":
+                return job, False
+
+            job = Job(key, payload)
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            return job, True
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts["capacity"] = self._queue.maxsize
+        return counts
+
+    def _prune(self):
+        # drop expired results, then the oldest finished jobs if over max_jobs
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        over = len(self._jobs) - self.max_jobs
+        for job in finished:
+            if now - job.finished_at > self.result_ttl or over > 0:
+                over -= 1
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            try:
+                job.result = self.run(job.payload, job.set_stage)
+                job.status = "done"
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            job.finished_at = time.time()
+            self._queue.task_done()
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+
+# latency buckets in seconds, from a cache hit to a slow LLM round trip
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """
+    Minimal thread-safe registry of counters and histograms, rendered in the
+    Prometheus text exposition format for /metrics.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}     # (name, labels) -> value
+        self._histograms = {}   # (name, labels) -> [bucket counts, sum, count]
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self._histograms.items())
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            header(name, "histogram")
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', bound),))} {bucket_count}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("schedule_stage_seconds", "Time spent in each stage of the schedule pipeline.")
+metrics.describe("schedule_requests_total", "Schedule pipeline runs by outcome.")
+metrics.describe("schedule_candidate_courses_total", "Courses left after the requirement, interest and time filters.")
+metrics.describe("schedule_sections_total", "Sections given to the combination search.")
+metrics.describe("schedule_combinations_explored_total", "Search nodes (a course tried on a partial schedule) visited.")
+metrics.describe("schedule_combinations_found_total", "Valid schedules streamed out of the search and scored.")
+
+
+class StageTimer:
+    """
+    Per-request stage timings and counts.
+
+    Laps of the same stage add up, and each stage is observed once in the
+    shared `schedule_stage_seconds` histogram when the request finishes.
+    Every count is added to its `schedule_<name>_total` counter; the request
+    keeps its own values for logs and the Server-Timing header.
+    """
+
+    def __init__(self, registry: Metrics = metrics):
+        self.registry = registry
+        self.durations = OrderedDict()  # stage -> seconds
+        self.counts = OrderedDict()     # counter name -> value
+        self.started_at = self._lap_start = time.perf_counter()
+
+    def lap(self, name: str):
+        """Close stage `name`: everything since the previous lap (or restart)."""
+        now = time.perf_counter()
+        elapsed = now - self._lap_start
+        self._lap_start = now
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def restart(self):
+        """Start the next stage now, e.g. after handing a partial result to a slow client."""
+        self._lap_start = time.perf_counter()
+
+    def count(self, name: str, value: int):
+        self.counts[name] = self.counts.get(name, 0) + value
+        self.registry.inc(f"schedule_{name}_total", value)
+
+    def finish(self, outcome: str = "ok"):
+        elapsed = time.perf_counter() - self.started_at
+        self.durations["total"] = elapsed
+        for name, seconds in self.durations.items():
+            self.registry.observe("schedule_stage_seconds", seconds, stage=name)
+        self.registry.inc("schedule_requests_total", outcome=outcome)
+
+    def server_timing(self) -> str:
+        """Value for the Server-Timing response header (durations in ms)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
+
+    def summary(self) -> str:
+        stages = " ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.durations.items())
+        counts = " ".join(f"{name}={value}" for name, value in self.counts.items())
+        return f"{stages} {counts}".strip()
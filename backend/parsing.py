@@ -0,0 +1,412 @@
+import ast
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import regex as re
+
+MODEL_NAME_PARSER = "claude-3-haiku-20240307"
+
+SYSTEM_MESSAGE_TIME = (
+    """You are a parser that converts natural‐language scheduling constraints into a Python
+        dictionary mapping each day of the week (Monday, Tuesday, …, Sunday) to a list of
+        disallowed time ranges. Time ranges must be tuples of two strings in HH:MM 24-hour format.
+        Days with no constraints should map to an empty list."""
+
+    """Important:
+            - Treat any “on any day” or “every day” rule as applying to all seven days.
+            - Also apply any day-specific rules in addition to the global ones.
+            - Do not merge or override constraints—if more than one applies to a given day, output them all as separate tuples.
+            - Always output exactly one Python dict literal, e.g.:
+
+            {
+            "Monday":    [("00:00","09:00")],
+            "Tuesday":   [("00:00","09:00")],
+            "Wednesday": [("00:00","09:00"),("15:00","23:59")],
+            … 
+            }"""
+        
+    """Important: Only output the dict literal - no surrounding text or explanation."""
+
+)
+
+SYSTEM_MESSAGE_INTERESTS = (
+    """You are an expert parser.
+Given a user's input describing their academic or course interests, extract and return only the areas of interest as a Python list of strings.
+Each string should be a concise topic, field, or subject area mentioned by the user.
+Do not include any explanation or extra text—output only the Python list literal.
+
+Examples:
+
+Input: "I'm interested in machine learning, data science, and maybe some neuroscience." Output: ["machine learning", "data science", "neuroscience"]
+
+Input: "I'd like to take classes in philosophy or cognitive science." Output: ["philosophy", "cognitive science"]
+
+Input: "Anything related to robotics, AI, or computer vision." Output: ["robotics", "AI", "computer vision"]
+
+Important:
+
+If no interests are found, return an empty list: [].
+Do not include any explanation or formatting—just the list."""
+
+)
+
+# shared by all requests; each parse runs its two LLM calls side by side
+PARSE_WORKERS = 8
+_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+
+
+def set_parse_workers(workers: int):
+    """Resize the LLM call pool (two calls per parse, so about twice the concurrent parses)."""
+    global PARSE_WORKERS, _executor
+    if workers < 1:
+        raise ValueError(f"PARSE_WORKERS must be at least 1, got {workers}")
+    if workers == PARSE_WORKERS:
+        return
+    old, _executor, PARSE_WORKERS = _executor, ThreadPoolExecutor(max_workers=workers), workers
+    # calls already submitted finish on the old pool
+    old.shutdown(wait=False)
+
+
+"""
+    normalize user input so trivially different phrasings share a cache entry
+"""
+def normalize_input(text: str) -> str:
+    return " ".join(text.lower().split()).strip(" .!?")
+
+
+class ParseCache:
+    """
+    LRU cache of raw LLM parse replies with a TTL, keyed by normalized input.
+
+    If `path` is given, entries are loaded from and written back to a JSON
+    file so common phrases survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()    # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable parse cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, (stored_at, value) in entries.items():
+            if now - stored_at <= self.ttl:
+                self._entries[key] = (stored_at, tuple(value))
+
+    def _save(self):
+        # write then rename, so a crash never leaves a half-written file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+
+"""
+    deterministic fast path for common constraint phrases ("no classes before 10am",
+    "no Fridays", "nothing after 5pm"); anything it doesn't fully understand goes to the LLM
+"""
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_WORDS = {
+    "monday": ["Monday"], "mon": ["Monday"],
+    "tuesday": ["Tuesday"], "tue": ["Tuesday"], "tues": ["Tuesday"],
+    "wednesday": ["Wednesday"], "wed": ["Wednesday"],
+    "thursday": ["Thursday"], "thu": ["Thursday"], "thur": ["Thursday"], "thurs": ["Thursday"],
+    "friday": ["Friday"], "fri": ["Friday"],
+    "saturday": ["Saturday"], "sat": ["Saturday"],
+    "sunday": ["Sunday"], "sun": ["Sunday"],
+    "weekday": DAYS[:5], "weekend": DAYS[5:],
+}
+DAY_RE = r"\b(" + "|".join(sorted(DAY_WORDS, key=len, reverse=True)) + r")s?\b"
+TIME_RE = r"(noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm)?)"
+PERIODS = {"morning": ("00:00", "12:00"), "afternoon": ("12:00", "17:00"), "evening": ("17:00", "23:59"),
+           "night": ("17:00", "23:59")}
+
+NEGATION_RE = re.compile(r"\b(?:no|nothing|not|don'?t|avoid|without|off)\b|\bfree\s+(?:on\s+)?" + DAY_RE)
+# hedges the rules can't represent; let the LLM handle those
+HEDGE_RE = re.compile(r"\b(?:unless|except|only|if|prefer|preferably|ideally|maybe|possible|try|rather)\b")
+INTEREST_RE = re.compile(r"\b(?:interest(?:ed|s)?|like|love|enjoy|into|passionate|curious|take|learn|study|related to)\b")
+CLAUSE_SPLIT_RE = re.compile(
+    r"[,;.!?]|\b(?:and|but|also|plus)\b(?=\s+(?:no|nothing|not|don'?t|avoid|i|i'm|im|interested|free)\b)"
+)
+RANGE_RE = re.compile(r"\b(?:between|from)\s+" + TIME_RE + r"\s*(?:and|to|-|until|till)\s*" + TIME_RE)
+BEFORE_RE = re.compile(r"\b(?:before|until|till|earlier than|prior to)\s+" + TIME_RE)
+AFTER_RE = re.compile(r"\b(?:after|past|later than)\s+" + TIME_RE)
+# joins day/period groups inside one clause ("no mornings or fridays")
+CONJUNCTION_RE = re.compile(r"\b(?:and|or|nor)\b|&")
+PERIOD_RE = re.compile(r"\b(?:" + "|".join(PERIODS) + r")s?\b")
+# words a constraint clause may contain besides days, times and negations
+FILLER_RE = re.compile(
+    r"\b(?:classes|class|lectures?|courses?|sections?|any|all|every|day|days|time|times|on|at|in|the|of|or|and|nor|"
+    r"a|an|during|please|i|i'd|i'm|im|want|would|to|have|be|scheduled|anything|thanks)\b|[&'\-]"
+)
+
+
+def to_hhmm(token: str):
+    """'10am' -> '10:00', '5:30pm' -> '17:30', '3' -> '15:00' (bare 1-7 read as pm)."""
+    token = token.strip()
+    if token == "noon":
+        return "12:00"
+    if token == "midnight":
+        return "00:00"
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", token)
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem == "pm" and hours < 12:
+        hours += 12
+    elif meridiem == "am" and hours == 12:
+        hours = 0
+    elif meridiem is None and 1 <= hours <= 7:
+        hours += 12
+    if hours > 23 or minutes > 59:
+        return None
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def _conjuncts(clause: str) -> list[str]:
+    # split on and/or, except inside a time range ("between 12 and 1pm")
+    ranges = [match.span() for match in RANGE_RE.finditer(clause)]
+    parts, start = [], 0
+    for match in CONJUNCTION_RE.finditer(clause):
+        if any(low <= match.start() < high for low, high in ranges):
+            continue
+        parts.append(clause[start:match.start()])
+        start = match.end()
+    parts.append(clause[start:])
+    return parts
+
+
+def _group_slots(text: str):
+    """Returns (days, slots, number of day words) named in one conjunct, or None."""
+    slots = []
+    for match in RANGE_RE.finditer(text):
+        slots.append((to_hhmm(match.group(1)), to_hhmm(match.group(2))))
+    text_rest = RANGE_RE.sub(" ", text)
+    for match in BEFORE_RE.finditer(text_rest):
+        slots.append(("00:00", to_hhmm(match.group(1))))
+    for match in AFTER_RE.finditer(text_rest):
+        slots.append((to_hhmm(match.group(1)), "23:59"))
+    for period, slot in PERIODS.items():
+        if re.search(rf"\b{period}s?\b", text):
+            slots.append(slot)
+    if any(start is None or end is None for start, end in slots):
+        return None
+
+    day_words = re.findall(DAY_RE, text)
+    days = []
+    for word in day_words:
+        days.extend(day for day in DAY_WORDS[word] if day not in days)
+    return days, slots, len(day_words)
+
+
+def _clause_slots(clause: str):
+    """
+    Returns [(days, [(start, end), ...]), ...] for a constraint clause, or None.
+
+    Groups joined by and/or are read separately: "no mornings or fridays" is
+    mornings on every day plus all of Friday. When a conjunction could share
+    days or times between groups ("no classes monday and wednesday mornings",
+    "nothing before 10 or after 5 on fridays"), or one group pairs several
+    days with several times, the reading is ambiguous and the LLM decides.
+    """
+    if not NEGATION_RE.search(clause) or HEDGE_RE.search(clause):
+        return None
+
+    groups = []
+    for part in _conjuncts(clause):
+        parsed = _group_slots(part)
+        if parsed is None:
+            return None
+        days, slots, day_words = parsed
+        if not days and not slots:
+            return None
+        if day_words > 1 and len(slots) > 1:
+            return None
+        groups.append((days, slots))
+
+    complete = [bool(days and slots) for days, slots in groups]
+    if len(groups) > 1 and any(complete) and not all(complete):
+        return None
+    # no days means every day, no times means all day ("no Fridays")
+    return [(days or DAYS, slots or [("00:00", "23:59")]) for days, slots in groups]
+
+
+def _leftover_words(clause: str) -> list[str]:
+    """Words of a constraint clause that aren't days, times, negations or filler."""
+    for pattern in (RANGE_RE, BEFORE_RE, AFTER_RE, PERIOD_RE, NEGATION_RE):
+        clause = pattern.sub(" ", clause)
+    clause = FILLER_RE.sub(" ", re.sub(DAY_RE, " ", clause))
+    return clause.split()
+
+
+def parse_constraints_fast(text: str):
+    """
+    Rule-based parse of simple scheduling constraints.
+
+    Returns (constraints, has_interests): constraints is the same
+    {day: [(start, end), ...]} dict the LLM produces, or None if any part of
+    the input isn't understood; has_interests is True when some clauses look
+    like interests, which still need the LLM. A constraint clause that also
+    mentions interests ("avoid mornings because I want to take philosophy")
+    sets has_interests too; one with any other words left over isn't
+    understood.
+    """
+    text = text.lower().replace("a.m.", "am").replace("p.m.", "pm")
+    clauses = [clause.strip() for clause in CLAUSE_SPLIT_RE.split(text) if clause and clause.strip()]
+    if not clauses:
+        return None, False
+
+    constraints = {day: [] for day in DAYS}
+    has_interests = matched = False
+    for clause in clauses:
+        groups = _clause_slots(clause)
+        if groups is not None:
+            for days, slots in groups:
+                for day in days:
+                    constraints[day].extend(slot for slot in slots if slot not in constraints[day])
+            matched = True
+            if INTEREST_RE.search(clause):
+                has_interests = True
+            elif _leftover_words(clause):
+                return None, False
+        elif INTEREST_RE.search(clause) and not re.search(DAY_RE, clause) and not re.search(r"\d", clause):
+            has_interests = True
+        else:
+            return None, False
+
+    return (constraints if matched else None), has_interests
+
+
+def parse_interests(interest_reply: str) -> list[str]:
+    """
+    The interests reply ('["machine learning", "history"]') as a deduplicated
+    list; a reply that isn't a list literal counts as a single interest.
+    """
+    try:
+        interests = ast.literal_eval(interest_reply)
+    except (ValueError, SyntaxError):
+        interests = interest_reply
+    if isinstance(interests, str):
+        interests = [interests]
+    if not isinstance(interests, (list, tuple, set)):
+        return []
+    return list(dict.fromkeys(str(text).strip() for text in interests if str(text).strip()))
+
+
+class FastPathStats:
+    """Thread-safe counters for how often the fast path and the parse cache save LLM calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "partial_hits": 0, "cache_hits": 0, "misses": 0}
+        self.llm_calls_saved = 0
+
+    def record(self, outcome: str, llm_calls_saved: int = 0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.llm_calls_saved += llm_calls_saved
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            counts["llm_calls_saved"] = self.llm_calls_saved
+        total = counts["hits"] + counts["partial_hits"] + counts["cache_hits"] + counts["misses"]
+        counts["hit_rate"] = (total - counts["misses"]) / total if total else 0.0
+        return counts
+
+
+fast_path_stats = FastPathStats()
+
+
+def _ask(client, system_message, text, model):
+    resp = client.messages.create(
+        model=model,
+        system=system_message,
+        max_tokens=512,
+        messages=[{"role": "user", "content": text}],
+    )
+    return resp.content[0].text.strip()
+
+
+"""
+    parse timing constraints from user input to a dict (see system message for format)
+"""
+def parse_user_input(text, client, cache: ParseCache = None, model: str = MODEL_NAME_PARSER):
+    """
+    Returns (interests reply, time constraints dict) for the user's text.
+
+    Common constraint phrases are parsed locally (see parse_constraints_fast);
+    otherwise the interest and time-constraint calls run concurrently. Replies
+    are cached by normalized text, so repeated phrases cost no LLM round trip.
+    """
+    fast_constraints, has_interests = parse_constraints_fast(text)
+    if fast_constraints is not None and not has_interests:
+        fast_path_stats.record("hits", llm_calls_saved=2)
+        return "[]", fast_constraints
+
+    key = normalize_input(text)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        interest_reply, reply = cached
+        # the fast path already covers the constraints of a partial hit, so the cache saves one call
+        fast_path_stats.record("cache_hits", llm_calls_saved=1 if fast_constraints is not None else 2)
+        return interest_reply, ast.literal_eval(reply)
+
+    if fast_constraints is not None:
+        # constraints understood locally; only the interests need the LLM
+        # interests still need the LLM
+        fast_path_stats.record("partial_hits", llm_calls_saved=1)
+        interest_reply = _ask(client, SYSTEM_MESSAGE_INTERESTS, text, model)
+        if cache is not None:
+            cache.put(key, (interest_reply, repr(fast_constraints)))
+        return interest_reply, fast_constraints
+
+    fast_path_stats.record("misses")
+
+    time_future = _executor.submit(_ask, client, SYSTEM_MESSAGE_TIME, text, model)
+    interest_future = _executor.submit(_ask, client, SYSTEM_MESSAGE_INTERESTS, text, model)
+    reply = time_future.result()
+    interest_reply = interest_future.result()
+
+    # print(f"\nClaude reply for time constraints: {reply}\n")
+
+    time_constraints = ast.literal_eval(reply)
+    # only cache replies that parsed
+    if cache is not None:
+        cache.put(key, (interest_reply, reply))
+
+    return interest_reply, time_constraints
@@ -0,0 +1,100 @@
+import pandas as pd
+
+"""
+    id-keyed course and section records, built once per catalog snapshot
+
+    Result assembly looks up a handful of courses and sections per schedule;
+    dict lookups on small __slots__ objects replace boolean scans over the
+    whole DataFrame for each one.
+"""
+
+
+class CourseRecord:
+    __slots__ = ("id", "abbreviation", "courseNumber", "title", "units", "department")
+
+    def __init__(self, id, abbreviation, courseNumber, title, units, department):
+        self.id = id
+        self.abbreviation = abbreviation
+        self.courseNumber = courseNumber
+        self.title = title
+        self.units = units
+        self.department = department
+
+    @property
+    def name(self) -> str:
+        return f"{self.abbreviation} {self.courseNumber}"
+
+
+class SectionRecord:
+    __slots__ = ("course_id", "section_id", "days", "start_min", "end_min", "instructor", "location")
+
+    def __init__(self, course_id, section_id, days, start_min, end_min, instructor, location):
+        self.course_id = course_id
+        self.section_id = section_id
+        self.days = days
+        self.start_min = start_min
+        self.end_min = end_min
+        self.instructor = instructor
+        self.location = location
+
+
+def _missing(value) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _column(df: pd.DataFrame, name: str, default=""):
+    # plain Python values, with missing columns / NaN as the default
+    if name not in df.columns:
+        return [default] * len(df)
+    return [default if _missing(value) else value for value in df[name].tolist()]
+
+
+class RecordStore:
+    """
+    Courses keyed by str(id), sections keyed by (str(course_id), section_id).
+
+    `first_section` holds each course's first section, for callers that only
+    know the course.
+    """
+
+    def __init__(self, courses: pd.DataFrame, sections: pd.DataFrame):
+        self.courses = {
+            str(values[0]): CourseRecord(*values)
+            for values in zip(
+                _column(courses, "id", None),
+                _column(courses, "abbreviation"),
+                _column(courses, "courseNumber"),
+                _column(courses, "title"),
+                _column(courses, "units"),
+                _column(courses, "department"),
+            )
+        }
+
+        self.sections = {}
+        self.first_section = {}
+        for values in zip(
+            _column(sections, "course_id", None),
+            _column(sections, "section_id", None),
+            [int(days) for days in _column(sections, "days", 0)],
+            [int(minutes) for minutes in _column(sections, "start_min", 0)],
+            [int(minutes) for minutes in _column(sections, "end_min", 0)],
+            _column(sections, "instructor"),
+            _column(sections, "location"),
+        ):
+            record = SectionRecord(*values)
+            self.sections[(str(record.course_id), record.section_id)] = record
+            self.first_section.setdefault(str(record.course_id), record)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def course(self, course_id):
+        return self.courses.get(str(course_id))
+
+    def section(self, course_id, section_id=None):
+        """The given section of a course, or its first one if section_id is None or unknown."""
+        record = self.sections.get((str(course_id), section_id)) if section_id is not None else None
+        return record or self.first_section.get(str(course_id))
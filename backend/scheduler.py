@@ -0,0 +1,421 @@
+import collections
+import functools
+import heapq
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import regex as re
+
+# weights for score_schedule; higher scores are better
+SCORE_WEIGHTS = {"interest": 1.0, "coverage": 1.0, "units": 0.25, "gaps": 0.5}
+DEFAULT_TARGET_UNITS = 16
+
+# parallel search: split by first course once the pool has at least this many courses
+PARALLEL_MIN_COURSES = 40
+
+
+"""
+    pairwise section conflicts, computed once per candidate pool
+"""
+def conflict_matrix(sections: pd.DataFrame) -> np.ndarray:
+    """
+    (n, n) boolean matrix: True where two sections share a day and their
+    [start, end] intervals overlap (start1 < end2 and start2 < end1).
+    """
+    start = sections["start_min"].to_numpy().astype(np.int32)
+    end = sections["end_min"].to_numpy().astype(np.int32)
+    days = sections["days"].to_numpy().astype(np.int32)
+
+    share_day = (days[:, None] & days[None, :]) != 0
+    return share_day & (start[:, None] < end[None, :]) & (start[None, :] < end[:, None])
+
+
+class ConflictGraph:
+    """
+    Section conflict graph for one candidate pool, with bitset adjacency.
+
+    Sections get integer ids (their row position in `sections`) and
+    `bits[i]` is a Python int with bit j set iff sections i and j conflict.
+    The OR of the bitsets of a partial schedule is its footprint: section j
+    fits the schedule iff bit j of the footprint is clear, so validity checks
+    are bitwise ANDs. Courses are numbered in `course_order` (e.g. from
+    rank_courses; courses it leaves out follow in sorted-id order, and by
+    default all are sorted by id) and `course_bits[c]` has a bit set for
+    each of course c's sections.
+
+    `days`, `start_min` and `end_min` are plain int lists indexed by section
+    id, for per-schedule scoring without DataFrame lookups.
+    """
+
+    def __init__(self, sections: pd.DataFrame, course_order=None):
+        self.sections = sections.reset_index(drop=True)
+        self.days = self.sections["days"].astype(int).tolist()
+        self.start_min = self.sections["start_min"].astype(int).tolist()
+        self.end_min = self.sections["end_min"].astype(int).tolist()
+        present = set(self.sections["course_id"].unique())
+        ordered = list(dict.fromkeys(c for c in course_order or [] if c in present))
+        self.course_ids = ordered + sorted(present - set(ordered))
+        position = {course_id: c for c, course_id in enumerate(self.course_ids)}
+        course_of = self.sections["course_id"].map(position).to_numpy(dtype=np.int32)
+        self._build(conflict_matrix(self.sections), course_of)
+
+    @classmethod
+    def from_arrays(cls, matrix: np.ndarray, course_of: np.ndarray) -> "ConflictGraph":
+        """Rebuild a graph from its conflict matrix and section -> course index array."""
+        graph = cls.__new__(cls)
+        graph.sections = graph.days = graph.start_min = graph.end_min = None
+        graph.course_ids = list(range(int(course_of.max()) + 1 if len(course_of) else 0))
+        graph._build(matrix, course_of)
+        return graph
+
+    def _build(self, matrix: np.ndarray, course_of: np.ndarray):
+        self.matrix = matrix
+        self.course_of = course_of
+        self.bits = [
+            int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little")
+            for row in matrix
+        ]
+        self.course_sections = [[] for _ in self.course_ids]
+        for section, course in enumerate(course_of.tolist()):
+            self.course_sections[course].append(section)
+        self.course_bits = [sum(1 << s for s in secs) for secs in self.course_sections]
+
+    def __len__(self):
+        return len(self.bits)
+
+    def conflicts(self, a: int, b: int) -> bool:
+        return bool(self.bits[a] >> b & 1)
+
+    def footprint(self, section_ids) -> int:
+        mask = 0
+        for s in section_ids:
+            mask |= self.bits[s]
+        return mask
+
+    def is_valid(self, section_ids) -> bool:
+        """True if no two of the given sections conflict."""
+        mask = 0
+        for s in section_ids:
+            if mask >> s & 1:
+                return False
+            mask |= self.bits[s]
+        return True
+
+
+"""
+    backtracking search over course combinations
+"""
+def iter_valid_schedules(graph: ConflictGraph, num_classes=4, first_course: int = None, stats: dict = None):
+    """
+    Lazily yield (course_ids, section_ids) for every valid combination.
+
+    A combination is valid if one section per course can be picked with no two
+    picked sections overlapping; section_ids is one such pick (ids into
+    graph.sections). Courses are added in graph order, keeping the
+    conflict-free section assignments of the current prefix keyed by their
+    footprint (assignments with equal footprints admit the same extensions);
+    after each step, remaining courses that can't extend any assignment are
+    dropped (forward checking), and a branch is abandoned as soon as too few
+    courses remain to reach num_classes. Combinations come out in the same
+    order as itertools.combinations over graph.course_ids, and no work is
+    done beyond what the consumer pulls.
+
+    With first_course set, only combinations whose lowest course index is
+    first_course are produced (one slice of the parallel search). With a
+    `stats` dict, stats["nodes"] counts the search nodes (a course tried on a
+    partial combination) visited so far.
+    """
+    if num_classes <= 0 or len(graph) == 0:
+        return
+
+    bits, course_sections, course_bits = graph.bits, graph.course_sections, graph.course_bits
+    if stats is not None:
+        stats.setdefault("nodes", 0)
+
+    def extensions(assignments, course):
+        # footprint -> sections for every conflict-free way to add one section of `course`
+        extended = {}
+        for mask, picked in assignments.items():
+            for section in course_sections[course]:
+                if not mask >> section & 1:
+                    extended.setdefault(mask | bits[section], picked + (section,))
+        return extended
+
+    def step(chosen, assignments, course, remaining):
+        # add `course` to the prefix and search everything it can be completed with
+        if stats is not None:
+            stats["nodes"] += 1
+        needed = num_classes - len(chosen)
+        extended = extensions(assignments, course)
+        if not extended:
+            return
+
+        if needed == 1:
+            yield [graph.course_ids[c] for c in chosen + [course]], next(iter(extended.values()))
+            return
+
+        # forward checking: keep only courses with a section outside some footprint
+        alive = [c for c in remaining if any(course_bits[c] & ~mask for mask in extended)]
+        if len(alive) >= needed - 1:
+            yield from search(chosen + [course], extended, alive)
+
+    def search(chosen, assignments, candidates):
+        needed = num_classes - len(chosen)
+        for position, course in enumerate(candidates):
+            remaining = candidates[position + 1:]
+            if len(remaining) < needed - 1:
+                return
+            yield from step(chosen, assignments, course, remaining)
+
+    courses = list(range(len(graph.course_ids)))
+    if first_course is None:
+        yield from search([], {0: ()}, courses)
+    elif len(courses) - first_course >= num_classes:
+        yield from step([], {0: ()}, first_course, courses[first_course + 1:])
+
+
+"""
+    parallel search: one task per first course on a process pool, with the
+    conflict matrix shared through shared memory
+"""
+_pool = None
+_pool_lock = threading.Lock()
+_worker_graphs = {}
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._max_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn, not fork: the web process runs threads (catalog refresher, model)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _attach_shared(name: str):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _search_task(shm_name: str, n: int, num_classes: int, first_course: int, limit: int):
+    graph = _worker_graphs.get(shm_name)
+    if graph is None:
+        shm = _attach_shared(shm_name)
+        try:
+            matrix = np.ndarray((n, n), dtype=bool, buffer=shm.buf).copy()
+            course_of = np.ndarray((n,), dtype=np.int32, buffer=shm.buf, offset=n * n).copy()
+        finally:
+            shm.close()
+        graph = ConflictGraph.from_arrays(matrix, course_of)
+        # workers are reused across requests; only keep the current pool's graph
+        _worker_graphs.clear()
+        _worker_graphs[shm_name] = graph
+
+    # ship results back as two small int arrays rather than lists of tuples
+    stats = {}
+    schedules = list(itertools.islice(iter_valid_schedules(graph, num_classes, first_course, stats), limit))
+    course_indices = np.array([courses for courses, _ in schedules], dtype=np.int32).reshape(-1, num_classes)
+    section_ids = np.array([sections for _, sections in schedules], dtype=np.int32).reshape(-1, num_classes)
+    return course_indices, section_ids, stats["nodes"]
+
+
+def iter_valid_schedules_parallel(graph: ConflictGraph, num_classes=4, workers: int = None, limit: int = None,
+                                  stats: dict = None):
+    """
+    Same stream as iter_valid_schedules, computed on a process pool.
+
+    The search space is split by first course; workers rebuild the bitsets
+    from the conflict matrix in shared memory (once per pool). At most one
+    task per worker is in flight, each asked for no more schedules than the
+    limit still needs, and nothing more is submitted once the limit is
+    reached. Results are merged in first-course order, so the output is
+    identical to the serial search. Closing the generator early cancels
+    tasks that haven't started. stats["nodes"] adds up the nodes of every
+    task whose results were merged.
+    """
+    n = len(graph)
+    if num_classes <= 0 or n == 0:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if stats is not None:
+        stats.setdefault("nodes", 0)
+    shm = shared_memory.SharedMemory(create=True, size=n * n + 4 * n)
+    pending = collections.deque()
+    try:
+        np.ndarray((n, n), dtype=bool, buffer=shm.buf)[:] = graph.matrix
+        np.ndarray((n,), dtype=np.int32, buffer=shm.buf, offset=n * n)[:] = graph.course_of
+
+        pool = _get_pool(workers)
+        first_courses = iter(range(len(graph.course_ids) - num_classes + 1))
+        produced = 0
+        course_ids = graph.course_ids
+
+        def submit():
+            # budget left after what's been yielded and what finished tasks already hold
+            budget = None
+            if limit is not None:
+                budget = limit - produced - sum(len(f.result()[0]) for f in pending if f.done())
+                if budget <= 0:
+                    return False
+            first_course = next(first_courses, None)
+            if first_course is None:
+                return False
+            pending.append(pool.submit(_search_task, shm.name, n, num_classes, first_course, budget))
+            return True
+
+        while len(pending) < workers and submit():
+            pass
+        while pending:
+            course_indices, section_ids, nodes = pending.popleft().result()
+            if stats is not None:
+                stats["nodes"] += nodes
+            for courses, sections in zip(course_indices.tolist(), section_ids.tolist()):
+                yield [course_ids[c] for c in courses], tuple(sections)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+            while len(pending) < workers and submit():
+                pass
+    finally:
+        for future in pending:
+            future.cancel()
+        # let running tasks finish attaching before the segment goes away
+        for future in pending:
+            if not future.cancelled():
+                try:
+                    future.result()
+                except Exception:
+                    pass
+        shm.close()
+        shm.unlink()
+
+
+def iter_schedules(graph: ConflictGraph, num_classes=4, workers: int = 1, limit: int = None,
+                   min_courses: int = PARALLEL_MIN_COURSES, stats: dict = None):
+    """Serial search for small pools, parallel once it's worth the process overhead."""
+    if workers is not None and workers > 1 and len(graph.course_ids) >= min_courses:
+        return iter_valid_schedules_parallel(graph, num_classes, workers, limit, stats)
+    return itertools.islice(iter_valid_schedules(graph, num_classes, stats=stats), limit)
+
+
+def find_non_overlapping_combinations(df_times_allowed, num_classes=4, limit=None, graph=None, workers=1):
+    """
+    Finds combinations of num_classes from df_times_allowed that do not overlap in time.
+    Returns a list of lists, where each inner list contains the course_ids of a valid combination.
+
+    See iter_valid_schedules for the search; stops after `limit` results when
+    given. Pass a prebuilt ConflictGraph to reuse it, and workers > 1 to search
+    large pools in parallel.
+    """
+    if graph is None:
+        if df_times_allowed.empty:
+            return []
+        graph = ConflictGraph(df_times_allowed)
+
+    return [course_ids for course_ids, _ in iter_schedules(graph, num_classes, workers, limit)]
+
+
+"""
+    cheap local scoring and a bounded top-K over the schedule stream
+"""
+@functools.lru_cache(maxsize=4096)
+def parse_units(units) -> float:
+    # units come as 4, "4.0" or ranges like "1 - 4"; use the upper bound
+    numbers = re.findall(r"\d+(?:\.\d+)?", str(units))
+    return max(map(float, numbers)) if numbers else 0.0
+
+
+def gap_minutes(graph: ConflictGraph, section_ids) -> int:
+    """Total idle minutes between consecutive classes on the same day."""
+    days, start_min, end_min = graph.days, graph.start_min, graph.end_min
+    rows = [(days[s], start_min[s], end_min[s]) for s in section_ids]
+    week = 0
+    for day_mask, _, _ in rows:
+        week |= day_mask
+    total = 0
+    for day in range(7):
+        if not week >> day & 1:
+            continue
+        meetings = sorted((start, end) for day_mask, start, end in rows if day_mask >> day & 1)
+        for (_, prev_end), (next_start, _) in zip(meetings, meetings[1:]):
+            total += max(0, next_start - prev_end)
+    return total
+
+
+def score_schedule(graph: ConflictGraph, course_ids, section_ids, course_info: dict,
+                   target_units: float = DEFAULT_TARGET_UNITS, weights: dict = SCORE_WEIGHTS) -> float:
+    """
+    Score a schedule from local signals only.
+
+    course_info maps course id -> dict with optional 'embedding' (distance to
+    the user's interests, lower is closer), 'required' (fulfils a major
+    requirement) and 'units'. Rewards interest matches and requirement
+    coverage, penalizes distance from target_units and idle gaps (per hour).
+    """
+    interest = coverage = units = 0.0
+    for course_id in course_ids:
+        info = course_info.get(course_id, {})
+        if info.get("embedding") is not None:
+            interest += 1.0 / (1.0 + info["embedding"])
+        coverage += 1.0 if info.get("required") else 0.0
+        units += parse_units(info.get("units", 0))
+
+    return (
+        weights["interest"] * interest
+        + weights["coverage"] * coverage
+        - weights["units"] * abs(units - target_units) / 4
+        - weights["gaps"] * gap_minutes(graph, section_ids) / 60
+    )
+
+
+def rank_courses(course_ids, course_info: dict) -> list:
+    """
+    Course ids by local value, for ConflictGraph(course_order=...): required
+    courses first, then interest matches by embedding distance, then the
+    rest, ties by id. The search emits combinations of the first courses
+    first, so a search budget covers the most promising part of the space.
+    """
+    def key(course_id):
+        info = course_info.get(course_id, {})
+        distance = info.get("embedding")
+        return (not info.get("required"), distance is None, distance or 0.0, str(course_id))
+    return sorted(course_ids, key=key)
+
+
+def top_k_schedules(schedules, k: int, score, max_explored: int = None, min_score: float = None) -> list:
+    """
+    Keep the k best-scoring items of a schedule stream in a bounded heap.
+
+    Consumes `schedules` lazily and stops after max_explored items, or as soon
+    as k items scoring at least min_score have been seen. Returns
+    (score, item) pairs, best first; ties keep stream order.
+    """
+    heap = []
+    good = 0
+    for explored, item in enumerate(schedules):
+        if max_explored is not None and explored >= max_explored:
+            break
+
+        value = score(item)
+        entry = (value, -explored, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+        if min_score is not None and value >= min_score:
+            good += 1
+            if good >= k:
+                break
+
+    return [(value, item) for value, _, item in sorted(heap, key=lambda e: e[:2], reverse=True)]
@@ -0,0 +1,149 @@
+import ast
+import json
+import numpy as np
+import pandas as pd
+
+# day bitmask: bit i set <=> section meets on DAY_NAMES[i]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_ABBREVIATIONS = ["M", "Tu", "W", "Th", "F", "Sa", "Su"]
+DAY_BITS = {name: 1 << i for i, name in enumerate(DAY_NAMES)}
+DAY_INDEX = {name: i for i, name in enumerate(DAY_NAMES)}
+MINUTES_PER_DAY = 24 * 60
+
+SECTION_COLUMNS = ["course_id", "section_id", "kind", "days", "start_min", "end_min", "instructor", "location"]
+
+
+"""
+    helpers to convert between the GraphQL formats and integer days/minutes
+"""
+def days_mask(word_days) -> int:
+    if not isinstance(word_days, str):
+        return 0
+    mask = 0
+    for i, abbreviation in enumerate(DAY_ABBREVIATIONS):
+        if abbreviation in word_days:
+            mask |= 1 << i
+    return mask
+
+
+def day_names(mask: int) -> list[str]:
+    return [name for i, name in enumerate(DAY_NAMES) if mask >> i & 1]
+
+
+def short_days(mask: int) -> str:
+    return "".join(abbreviation for i, abbreviation in enumerate(DAY_ABBREVIATIONS) if mask >> i & 1)
+
+
+def to_minutes(time_str):
+    """Minutes after midnight for 'HH:MM' or an ISO datetime like '1900-01-01T09:30:00'."""
+    if not time_str:
+        return None
+    hours, minutes = time_str.split("T")[-1].split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes) -> str:
+    return f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+
+
+def parse_section_set(section_set):
+    # Supabase stores the GraphQL payload stringified; scraper output has it as a dict
+    if isinstance(section_set, dict):
+        return section_set
+    if not isinstance(section_set, str) or not section_set:
+        return None
+    try:
+        return json.loads(section_set)
+    except ValueError:
+        return ast.literal_eval(section_set)
+
+
+"""
+    build the normalized sections table (one row per primary section) for a set of courses
+"""
+def build_sections_table(courses) -> pd.DataFrame:
+    """
+    Flatten every course's sectionSet into a columnar sections table.
+
+    Parsed once per catalog snapshot (or at ingest), so requests only slice
+    integer columns: days is a weekday bitmask and start_min/end_min are
+    minutes after midnight. Sections without a start or end time are dropped.
+
+    Args:
+        courses: DataFrame or list of course dicts with 'id' and 'sectionSet'
+    """
+    if not isinstance(courses, pd.DataFrame):
+        courses = pd.DataFrame(list(courses), columns=["id", "sectionSet"])
+
+    columns = {name: [] for name in SECTION_COLUMNS}
+    for course_id, section_set in zip(courses["id"], courses["sectionSet"]):
+        section_dict = parse_section_set(section_set)
+        if not isinstance(section_dict, dict) or not isinstance(section_dict.get("edges"), list):
+            continue
+
+        for edge in section_dict["edges"]:
+            node = edge.get("node") if isinstance(edge, dict) else None
+            if not isinstance(node, dict):
+                continue
+            start, end = to_minutes(node.get("startTime")), to_minutes(node.get("endTime"))
+            if start is None or end is None:
+                continue
+
+            columns["course_id"].append(course_id)
+            columns["section_id"].append(node.get("id"))
+            columns["kind"].append(node.get("kind"))
+            columns["days"].append(days_mask(node.get("wordDays")))
+            columns["start_min"].append(start)
+            columns["end_min"].append(end)
+            columns["instructor"].append(node.get("instructor") or "")
+            columns["location"].append(node.get("locationName") or "")
+
+    return pd.DataFrame({
+        "course_id": pd.Series(columns["course_id"], dtype=object),
+        "section_id": pd.Series(columns["section_id"], dtype=object),
+        "kind": pd.Series(columns["kind"], dtype="category"),
+        "days": np.array(columns["days"], dtype=np.uint8),
+        "start_min": np.array(columns["start_min"], dtype=np.int16),
+        "end_min": np.array(columns["end_min"], dtype=np.int16),
+        "instructor": pd.Series(columns["instructor"], dtype=object),
+        "location": pd.Series(columns["location"], dtype=object),
+    })
+
+
+"""
+    vectorized time-constraint filtering
+"""
+def compile_constraints(disallowed_slots: dict) -> np.ndarray:
+    """
+    Compile the parsed constraint dict {day: [("HH:MM", "HH:MM"), ...]} into
+    a (7, 1441) boolean minute bitmap, once per request.
+
+    A slot blocks the minutes strictly inside it, so a class is disallowed when
+    its start or end falls strictly inside a slot (classes may start right when
+    a slot ends, or end right when one begins).
+    """
+    blocked = np.zeros((len(DAY_NAMES), MINUTES_PER_DAY + 1), dtype=bool)
+    for day, slots in (disallowed_slots or {}).items():
+        if day not in DAY_INDEX:
+            continue
+        for slot in slots or []:
+            try:
+                dis_start, dis_end = to_minutes(slot[0]), to_minutes(slot[1])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if dis_start is None or dis_end is None:
+                continue
+            blocked[DAY_INDEX[day], max(dis_start + 1, 0):min(dis_end, MINUTES_PER_DAY + 1)] = True
+    return blocked
+
+
+def disallowed_sections(sections: pd.DataFrame, blocked: np.ndarray) -> np.ndarray:
+    """Boolean mask over the rows of a sections table that hit a blocked minute."""
+    start = np.clip(sections["start_min"].to_numpy(), 0, MINUTES_PER_DAY).astype(np.intp)
+    end = np.clip(sections["end_min"].to_numpy(), 0, MINUTES_PER_DAY).astype(np.intp)
+    days = sections["days"].to_numpy().astype(np.intp)
+
+    # (7, n): does section j meet on day i, and does its start/end land in a blocked minute
+    meets = (days[None, :] >> np.arange(len(DAY_NAMES))[:, None]) & 1
+    hits = blocked[:, start] | blocked[:, end]
+    return (hits & meets.astype(bool)).any(axis=0)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = ipc = None
+
+"""
+    offline catalog snapshot: Arrow IPC files (courses, sections, descriptions) plus a manifest
+
+    The manifest is replaced atomically and names table files that carry the
+    snapshot id, so a reader never sees a half-written snapshot and files
+    that are still memory-mapped by a running server are never overwritten.
+    A build keeps the previous build's files, so a reader that has just read
+    the old manifest can still open them.
+"""
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_TABLES = ["courses", "sections", "descriptions"]
+SNAPSHOT_FORMAT = 1
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Catalog snapshots need pyarrow: pip install pyarrow")
+
+
+def read_manifest(snapshot_dir: str) -> dict:
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_snapshot(snapshot_dir: str, courses: pd.DataFrame, sections: pd.DataFrame,
+                   descriptions: pd.DataFrame) -> dict:
+    """
+    Write the three tables as uncompressed Arrow IPC files (so they can be
+    memory-mapped) and point the manifest at them. Returns the manifest.
+    """
+    require_pyarrow()
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    tables = {
+        "courses": pa.Table.from_pandas(courses, preserve_index=False),
+        "sections": pa.Table.from_pandas(sections, preserve_index=False),
+        "descriptions": pa.Table.from_pandas(descriptions, preserve_index=False),
+    }
+
+    digest = hashlib.sha1()
+    for name in SNAPSHOT_TABLES:
+        sink = pa.BufferOutputStream()
+        with ipc.new_file(sink, tables[name].schema) as writer:
+            writer.write_table(tables[name])
+        tables[name] = sink.getvalue()
+        digest.update(tables[name])
+    snapshot_id = digest.hexdigest()[:16]
+
+    try:
+        previous = set(read_manifest(snapshot_dir)["files"].values())
+    except (OSError, ValueError, KeyError):
+        previous = set()
+
+    files = {}
+    for name in SNAPSHOT_TABLES:
+        files[name] = f"{name}-{snapshot_id}.arrow"
+        with open(os.path.join(snapshot_dir, files[name]), "wb") as f:
+            f.write(tables[name])
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "id": snapshot_id,
+        "built_at": time.time(),
+        "files": files,
+        "rows": {"courses": len(courses), "sections": len(sections), "descriptions": len(descriptions)},
+    }
+    # write then rename, so readers see either the old manifest or the new one
+    tmp_path = os.path.join(snapshot_dir, f"{MANIFEST_NAME}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, MANIFEST_NAME))
+
+    # table files of the builds before the previous one; a server that still maps them keeps its pages
+    keep = set(files.values()) | previous
+    for file_name in os.listdir(snapshot_dir):
+        if file_name.endswith(".arrow") and file_name not in keep:
+            os.remove(os.path.join(snapshot_dir, file_name))
+    return manifest
+
+
+def map_table(snapshot_dir: str, file_name: str):
+    """Arrow table backed by a memory map of the file; pages are shared between processes."""
+    source = pa.memory_map(os.path.join(snapshot_dir, file_name), "r")
+    return ipc.open_file(source).read_all()
+
+
+class SnapshotDescriptions:
+    """Descriptions by course id, read from the mapped table only when asked for."""
+
+    def __init__(self, table):
+        self.table = table
+        self.positions = {str(i): p for p, i in enumerate(table.column("id").to_pylist())}
+
+    def get(self, ids) -> dict:
+        found = {}
+        column = self.table.column("description")
+        for i in ids:
+            position = self.positions.get(str(i))
+            if position is not None:
+                found[str(i)] = column[position].as_py() or ""
+        return found
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.table.to_pandas()
+
+
+def load_snapshot(snapshot_dir: str, manifest: dict = None):
+    """
+    Returns (manifest, courses, sections, descriptions).
+
+    Numeric section columns come out of the memory map without a copy; text
+    columns are materialized by pandas. Descriptions stay in the mapped table.
+    """
+    require_pyarrow()
+    manifest = manifest or read_manifest(snapshot_dir)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported catalog snapshot format {manifest.get('format')} in {snapshot_dir}")
+
+    files = manifest["files"]
+    courses = map_table(snapshot_dir, files["courses"]).to_pandas()
+    sections = map_table(snapshot_dir, files["sections"]).to_pandas(split_blocks=True)
+    descriptions = SnapshotDescriptions(map_table(snapshot_dir, files["descriptions"]))
+    return manifest, courses, sections, descriptions
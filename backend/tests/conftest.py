@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the backend modules import each other as top-level modules (see app.py)
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
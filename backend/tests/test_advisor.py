@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+from advisor import advisor_system_prompt, parse_advisor_reply, pick_schedules
+
+
+class RecordingClient:
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.messages = self
+
+    def create(self, **request):
+        self.requests.append(request)
+        return SimpleNamespace(content=[SimpleNamespace(text=self.reply)])
+
+
+def test_prompt_follows_the_number_of_picks():
+    assert "the 4 best schedules" in advisor_system_prompt(4)
+    assert "e.g. [3, 0, 7, 1]." in advisor_system_prompt(4)
+    prompt = advisor_system_prompt(2)
+    assert "the 2 best schedules" in prompt and "e.g. [3, 0]." in prompt and "4 best" not in prompt
+    # weekend meetings are rendered as Sa/Su, so the legend lists them too
+    assert "(M Tu W Th F Sa Su)" in prompt
+
+
+def test_parse_advisor_reply_tops_up_from_the_ranking():
+    assert parse_advisor_reply("[5, 2, 5, 99]", num_candidates=8, picks=4) == [5, 2, 0, 1]
+    assert parse_advisor_reply("no idea", num_candidates=8, picks=2) == [0, 1]
+
+
+def test_pick_schedules_asks_for_picks():
+    candidates = [[{"id": i, "days": "Sa", "start": "09:00", "end": "10:00"}] for i in range(6)]
+    courses = {i: {"name": f"C {i}", "title": "Title", "units": "4"} for i in range(6)}
+    client = RecordingClient("[4, 1]")
+    assert pick_schedules(client, "model", "art", candidates, courses, picks=2) == [4, 1]
+    assert "the 2 best schedules" in client.requests[0]["system"]
+
+    # nothing to choose between: no call
+    assert pick_schedules(client, "model", "art", candidates[:2], courses, picks=2) == [0, 1]
+    assert len(client.requests) == 1
@@ -0,0 +1,109 @@
+import pytest
+
+import catalog
+from bench.stubs import SupabaseStub
+from bench.synthetic import synthetic_courses
+from catalog import CatalogCache, get_courses_concurrently, get_courses_from_supabase
+
+
+@pytest.fixture
+def rows():
+    return [{**course, "updated_at": "2025-01-01"} for course in synthetic_courses(2500, seed=1)]
+
+
+def test_concurrent_fetch_matches_sequential(rows):
+    client = SupabaseStub(rows)
+    concurrent = get_courses_concurrently(client, ["id", "title"], page_size=1000, max_workers=3)
+    assert concurrent == get_courses_from_supabase(client, ["id", "title"])
+    assert sorted(row["id"] for row in concurrent) == sorted(row["id"] for row in rows)
+
+
+def test_concurrent_fetch_picks_up_rows_added_after_the_count(rows, monkeypatch):
+    monkeypatch.setattr(catalog, "count_courses", lambda client: 1000)
+    assert len(get_courses_concurrently(SupabaseStub(rows), "id", page_size=1000)) == len(rows)
+
+
+def test_failed_pages_are_retried(rows, monkeypatch):
+    monkeypatch.setattr(catalog.time, "sleep", lambda seconds: None)
+    client = SupabaseStub(rows)
+    table = client.table
+    failures = {"left": 2}
+
+    def flaky_table(name):
+        query = table(name)
+        execute = query.execute
+
+        def flaky_execute():
+            if query.window and query.window[0] == 1000 and failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("connection reset")
+            return execute()
+
+        query.execute = flaky_execute
+        return query
+
+    client.table = flaky_table
+    assert len(get_courses_concurrently(client, "id", page_size=1000)) == len(rows)
+    assert failures["left"] == 0
+
+
+def test_cache_only_makes_new_snapshots_for_changes(rows):
+    client = SupabaseStub(rows)
+    cache = CatalogCache(client, fetch_workers=4)
+    seen = []
+    cache.add_listener(seen.append)
+
+    first = cache.refresh()
+    assert len(first) == len(rows) and first.version == 1 and first.changed_ids is None
+    assert first.records.course(rows[0]["id"]).title == rows[0]["title"]
+    assert cache.refresh() is first
+
+    rows[5]["title"] = "Renamed"
+    second = cache.refresh()
+    assert second.version == 2
+    assert second.records.course(rows[5]["id"]).title == "Renamed"
+    assert seen == [first, second]
+
+
+def test_delta_refresh_only_fetches_changed_rows(rows):
+    client = SupabaseStub(rows)
+    cache = CatalogCache(client, updated_at_column="updated_at", fetch_workers=1)
+    first = cache.refresh()
+    sections_before = len(first.sections)
+
+    rows[7] = {**rows[7], "title": "Updated", "updated_at": "2025-02-01"}
+    second = cache.refresh()
+    assert second.changed_ids == {rows[7]["id"]}
+    assert second.cursor == "2025-02-01"
+    assert len(second) == len(rows) and len(second.sections) == sections_before
+    assert second.records.course(rows[7]["id"]).title == "Updated"
+
+    # nothing newer than the cursor: the snapshot is kept
+    assert cache.refresh() is second
+
+
+def test_descriptions_are_fetched_by_id(rows):
+    cache = CatalogCache(SupabaseStub(rows))
+    ids = [rows[0]["id"], rows[3]["id"]]
+    assert cache.get_descriptions(ids) == {str(rows[0]["id"]): rows[0]["description"],
+                                           str(rows[3]["id"]): rows[3]["description"]}
+
+
+def test_description_only_edits_are_picked_up(rows):
+    cache = CatalogCache(SupabaseStub(rows), full_refresh_every=1)
+    seen = []
+    cache.add_listener(seen.append)
+    first = cache.refresh()
+    cache.load_descriptions()
+    course_id = str(rows[4]["id"])
+    assert cache.get_descriptions([course_id]) == {course_id: rows[4]["description"]}
+
+    rows[4]["description"] = "A rewritten description."
+    second = cache.refresh()
+    assert second is not first
+    assert second.changed_ids == {course_id}
+    assert seen == [first, second]
+    assert cache.get_descriptions([course_id]) == {course_id: "A rewritten description."}
+
+    # descriptions unchanged since the last check: the snapshot is kept
+    assert cache.refresh() is second
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import embeddings
+from embeddings import course_metadata, query_interests, reciprocal_rank_fusion, schedulable_filter, sync_embeddings
+from bench.stubs import keyword_embed as embed
+
+
+@pytest.fixture
+def numpy_store(monkeypatch):
+    monkeypatch.setattr(embeddings, "VECTOR_STORE", "numpy")
+    monkeypatch.setattr(embeddings, "_stores", {})
+    monkeypatch.setattr(embeddings, "get_embedding_function", lambda: embed)
+
+
+def test_reciprocal_rank_fusion():
+    scores = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=1)
+    assert scores == pytest.approx({"a": 1 / 2, "b": 1 / 3 + 1 / 2, "c": 1 / 4, "d": 1 / 3})
+    assert list(scores) == ["a", "b", "c", "d"]
+
+
+def test_schedulable_filter_pushes_down_the_shorter_list():
+    assert schedulable_filter(["1"], ["1", "2", "3"]) == {"$and": [{"has_primary": True}, {"id": {"$in": ["1"]}}]}
+    assert schedulable_filter(["1", "2"], ["1", "2", "3"]) == {
+        "$and": [{"has_primary": True}, {"id": {"$nin": ["3"]}}]
+    }
+    assert schedulable_filter(["1", "2", "3"], ["1", "2", "3"]) == {"has_primary": True}
+
+
+def test_course_metadata():
+    courses = pd.DataFrame({"id": [1, 2], "department": ["CS", None], "units": ["4", None]})
+    sections = pd.DataFrame({"course_id": [1, 1], "days": [0b00101, 0b01010]})
+    metadata = course_metadata(courses, sections)
+    assert metadata.loc["1"].tolist() == ["CS", "4", True, 0b01111]
+    assert metadata.loc["2"].tolist() == ["", "", False, 0]
+
+
+def test_sync_only_embeds_changes(numpy_store, tmp_path):
+    df = pd.DataFrame({"id": [1, 2, 3], "description": ["machine learning", "world history", "art"],
+                       "has_primary": [True, True, False]})
+    assert sync_embeddings(df, "id", "description", str(tmp_path), metadata_cols=["has_primary"]) == {
+        "upserted": 3, "deleted": 0, "unchanged": 0
+    }
+    df.loc[0, "description"] = "deep learning"
+    assert sync_embeddings(df.iloc[:2], "id", "description", str(tmp_path), metadata_cols=["has_primary"]) == {
+        "upserted": 1, "deleted": 1, "unchanged": 1
+    }
+
+
+def test_query_interests_fuses_and_filters(numpy_store, tmp_path):
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "description": ["machine learning", "learning history", "world history", "art history"],
+        "has_primary": [True, True, True, False],
+    })
+    sync_embeddings(df, "id", "description", str(tmp_path), metadata_cols=["has_primary"])
+
+    results = query_interests(["learning", "history"], str(tmp_path), top_k=2, where={"has_primary": True})
+    ids = results["ids"][0]
+    # course 2 is near both interests, so it ranks first; 4 has no primary section
+    assert ids[0] == "2"
+    assert set(ids) == {"1", "2", "3"}
+    assert results["scores"][0] == sorted(results["scores"][0], reverse=True)
+
+    assert query_interests([], str(tmp_path))["ids"] == [[]]
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from indexes import CourseNameIndex, parse_course_name
+
+
+def test_parse_course_name():
+    assert parse_course_name("el eng  c106a") == ("EL ENG", "C106A")
+    assert parse_course_name("COMPSCI 61B") == ("COMPSCI", "61B")
+    assert parse_course_name("61B") is None
+
+
+def test_lookup_handles_cross_listing_and_aliases():
+    df = pd.DataFrame({
+        "abbreviation": ["COMPSCI", "EL ENG", "EECS", "MATH", None],
+        "courseNumber": ["61A", "C128", "16A", "54", None],
+    })
+    index = CourseNameIndex(df)
+
+    assert index.lookup("compsci 61a") == [0]
+    # with or without the cross-listing C
+    assert index.lookup("EL ENG 128") == [1]
+    assert index.lookup("EL ENG C128") == [1]
+    # EECS courses satisfy COMPSCI / EL ENG requirements and vice versa
+    assert index.lookup("EL ENG 16A") == [2]
+    assert index.lookup("EECS C128") == [1]
+    assert index.lookup("MATH 53") == []
+    assert index.lookup("not a course") == []
+
+    assert index.resolve(["MATH 54", "COMPSCI 61A", "MATH 54", "HISTORY 7A"]) == [3, 0]
@@ -0,0 +1,106 @@
+import pytest
+
+import parsing
+from bench.stubs import AnthropicStub
+from parsing import DAYS, FastPathStats, ParseCache, parse_constraints_fast, parse_user_input, set_parse_workers
+
+MORNING, AFTERNOON, NIGHT, ALL_DAY = ("00:00", "12:00"), ("12:00", "17:00"), ("17:00", "23:59"), ("00:00", "23:59")
+
+
+def blocked(text):
+    constraints, has_interests = parse_constraints_fast(text)
+    assert constraints is not None, text
+    return {day: slots for day, slots in constraints.items() if slots}, has_interests
+
+
+def test_simple_phrases():
+    assert blocked("no classes before 10am") == ({day: [("00:00", "10:00")] for day in DAYS}, False)
+    assert blocked("No Fridays") == ({"Friday": [ALL_DAY]}, False)
+    assert blocked("nothing after 5:30 p.m.") == ({day: [("17:30", "23:59")] for day in DAYS}, False)
+    assert blocked("no classes between 12 and 1pm on weekdays") == (
+        {day: [("12:00", "13:00")] for day in DAYS[:5]}, False
+    )
+
+
+def test_or_reads_groups_separately():
+    expected = {day: [MORNING] for day in DAYS}
+    expected["Friday"] = [MORNING, ALL_DAY]
+    assert blocked("no mornings or fridays") == (expected, False)
+
+    expected = {day: [NIGHT] for day in DAYS}
+    expected["Saturday"] = expected["Sunday"] = [NIGHT, ALL_DAY]
+    assert blocked("no classes at night or on weekends") == (expected, False)
+
+    assert blocked("no mondays or wednesdays") == ({"Monday": [ALL_DAY], "Wednesday": [ALL_DAY]}, False)
+
+
+def test_and_pairs_days_with_their_own_times():
+    assert blocked("no classes monday mornings and wednesday afternoons") == (
+        {"Monday": [MORNING], "Wednesday": [AFTERNOON]}, False
+    )
+
+
+def test_separate_clauses_add_up():
+    expected = {day: [NIGHT] for day in DAYS}
+    expected["Friday"] = [ALL_DAY, NIGHT]
+    assert blocked("no Fridays and nothing after 5pm") == (expected, False)
+
+
+@pytest.mark.parametrize("text", [
+    "no classes monday and wednesday mornings",
+    "nothing before 10 or after 5 on fridays",
+    "no classes monday morning wednesday afternoon",
+    "no classes",
+    "no classes before 10 unless it's a lab",
+    "mornings are fine",
+])
+def test_ambiguous_or_unknown_phrases_go_to_the_llm(text):
+    assert parse_constraints_fast(text) == (None, False)
+
+
+def test_interest_clauses_are_flagged():
+    constraints, has_interests = parse_constraints_fast("I'm interested in machine learning, no mornings")
+    assert has_interests
+    assert constraints == {day: [MORNING] for day in DAYS}
+
+
+@pytest.mark.parametrize("text", [
+    "no classes before 10am i like economics",
+    "avoid mornings because I want to take philosophy",
+])
+def test_interests_inside_a_constraint_clause_are_flagged(text):
+    constraints, has_interests = parse_constraints_fast(text)
+    assert constraints is not None
+    assert has_interests
+
+
+def test_unknown_words_in_a_constraint_clause_go_to_the_llm():
+    assert parse_constraints_fast("no classes before 10am for labs") == (None, False)
+    assert blocked("don't want any classes on fridays please") == ({"Friday": [ALL_DAY]}, False)
+
+
+def test_cache_hits_are_counted(monkeypatch):
+    stats = FastPathStats()
+    monkeypatch.setattr(parsing, "fast_path_stats", stats)
+    client, cache = AnthropicStub(), ParseCache()
+
+    for _ in range(2):
+        parse_user_input("I like history, mornings are fine", client, cache)
+        parse_user_input("I like history, no fridays", client, cache)
+    parse_user_input("no fridays", client, cache)
+    assert client.calls == 3
+
+    snapshot = stats.snapshot()
+    assert {key: snapshot[key] for key in stats.counts} == {"hits": 1, "partial_hits": 1, "cache_hits": 2, "misses": 1}
+    assert snapshot["llm_calls_saved"] == 2 + 1 + 2 + 1
+    assert snapshot["hit_rate"] == 4 / 5
+
+
+def test_parse_workers_can_be_resized(monkeypatch):
+    monkeypatch.setattr(parsing, "PARSE_WORKERS", parsing.PARSE_WORKERS)
+    monkeypatch.setattr(parsing, "_executor", parsing._executor)
+    set_parse_workers(2)
+    assert parsing._executor._max_workers == 2
+    assert parse_user_input("I like history, mornings are fine", AnthropicStub(), ParseCache())[0]
+    with pytest.raises(ValueError):
+        set_parse_workers(0)
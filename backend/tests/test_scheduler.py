@@ -0,0 +1,122 @@
+import itertools
+import random
+
+import pandas as pd
+import pytest
+
+from scheduler import (ConflictGraph, find_non_overlapping_combinations, gap_minutes, iter_schedules,
+                       iter_valid_schedules, iter_valid_schedules_parallel, rank_courses, top_k_schedules)
+
+DAY_MASKS = [0b10101, 0b01010, 0b00101, 0b00001, 0b10000]  # MWF, TuTh, MW, M, F
+
+
+def random_sections(num_courses: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for course in range(num_courses):
+        for section in range(rng.randint(1, 3)):
+            start = rng.randrange(8 * 60, 17 * 60, 30)
+            rows.append({
+                "course_id": f"c{course:02d}",
+                "section_id": f"c{course:02d}-{section}",
+                "days": rng.choice(DAY_MASKS),
+                "start_min": start,
+                "end_min": start + rng.choice([50, 80]),
+            })
+    return pd.DataFrame(rows)
+
+
+def overlaps(a, b) -> bool:
+    # the original are_times_overlapping: a shared day and start1 < end2 and start2 < end1
+    return bool(a["days"] & b["days"]) and a["start_min"] < b["end_min"] and b["start_min"] < a["end_min"]
+
+
+def brute_force(sections: pd.DataFrame, num_classes: int) -> list[list]:
+    # the original find_non_overlapping_combinations: itertools.combinations x itertools.product
+    by_course = {course_id: group.to_dict("records") for course_id, group in sections.groupby("course_id")}
+    valid = []
+    for combo in itertools.combinations(sorted(by_course), num_classes):
+        for picked in itertools.product(*(by_course[course_id] for course_id in combo)):
+            if not any(overlaps(a, b) for a, b in itertools.combinations(picked, 2)):
+                valid.append(list(combo))
+                break
+    return valid
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("num_classes", [2, 3, 4])
+def test_search_matches_brute_force(seed, num_classes):
+    sections = random_sections(12, seed)
+    graph = ConflictGraph(sections)
+
+    schedules = list(iter_valid_schedules(graph, num_classes))
+    assert [course_ids for course_ids, _ in schedules] == brute_force(sections, num_classes)
+
+    # the section pick is one section per course, with no two overlapping
+    for course_ids, section_ids in schedules:
+        rows = [graph.sections.iloc[s] for s in section_ids]
+        assert [row["course_id"] for row in rows] == course_ids
+        assert not any(overlaps(a, b) for a, b in itertools.combinations(rows, 2))
+
+
+def test_limit_returns_a_prefix():
+    graph = ConflictGraph(random_sections(15, seed=1))
+    everything = find_non_overlapping_combinations(None, 4, graph=graph)
+    assert find_non_overlapping_combinations(None, 4, limit=7, graph=graph) == everything[:7]
+
+
+def test_course_order_changes_the_order_not_the_results():
+    sections = random_sections(12, seed=4)
+    info = {"c07": {"required": True}, "c03": {"embedding": 0.9}, "c09": {"embedding": 0.2}}
+    order = rank_courses(sorted(sections["course_id"].unique()), info)
+    assert order[:4] == ["c07", "c09", "c03", "c00"]
+
+    graph = ConflictGraph(sections, order)
+    assert graph.course_ids == order
+    ranked = list(iter_valid_schedules(graph, 3))
+    assert ranked[0][0][0] == "c07"
+    assert sorted(sorted(course_ids) for course_ids, _ in ranked) == brute_force(sections, 3)
+
+
+def test_node_stats_count_the_search():
+    graph = ConflictGraph(random_sections(10, seed=2))
+    stats = {}
+    found = list(iter_schedules(graph, 3, stats=stats))
+    assert stats["nodes"] >= len(found) > 0
+
+
+@pytest.mark.parametrize("limit", [None, 1, 25])
+def test_parallel_matches_serial(limit):
+    graph = ConflictGraph(random_sections(14, seed=3))
+    serial = list(itertools.islice(iter_valid_schedules(graph, 3), limit))
+    serial_stats, parallel_stats = {}, {}
+    parallel = list(iter_valid_schedules_parallel(graph, 3, workers=2, limit=limit, stats=parallel_stats))
+    assert parallel == serial
+    if limit is None:
+        list(iter_valid_schedules(graph, 3, stats=serial_stats))
+        assert parallel_stats == serial_stats
+
+
+def test_gap_minutes():
+    sections = pd.DataFrame({
+        "course_id": ["a", "b", "c"],
+        "days": [0b00101, 0b00001, 0b00010],   # MW, M, Tu
+        "start_min": [9 * 60, 11 * 60, 9 * 60],
+        "end_min": [10 * 60, 12 * 60, 10 * 60],
+    })
+    # Monday: 10:00 -> 11:00 idle; Wednesday and Tuesday have one class each
+    assert gap_minutes(ConflictGraph(sections), [0, 1, 2]) == 60
+
+
+def test_top_k_keeps_the_best_and_stops_early():
+    seen = []
+
+    def stream():
+        for value in [3, 9, 1, 7, 8, 2]:
+            seen.append(value)
+            yield value
+
+    assert top_k_schedules(stream(), k=2, score=float) == [(9.0, 9), (8.0, 8)]
+    seen.clear()
+    assert top_k_schedules(stream(), k=2, score=float, min_score=7) == [(9.0, 9), (7.0, 7)]
+    assert seen == [3, 9, 1, 7]
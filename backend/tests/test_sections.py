@@ -0,0 +1,78 @@
+import datetime
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from sections import (DAY_NAMES, build_sections_table, compile_constraints, day_names, days_mask,
+                      disallowed_sections, format_minutes, to_minutes)
+
+
+def parse_time_str(time_str):
+    return datetime.datetime.strptime(time_str, "%H:%M").time()
+
+
+def is_time_disallowed(start_time_str, end_time_str, days, disallowed_slots):
+    # the original per-row check: the start or the end falls strictly inside a slot
+    course_start, course_end = parse_time_str(start_time_str), parse_time_str(end_time_str)
+    for day in days:
+        for slot in disallowed_slots.get(day, []):
+            dis_start, dis_end = parse_time_str(slot[0]), parse_time_str(slot[1])
+            if dis_start < course_start < dis_end or dis_start < course_end < dis_end:
+                return True
+    return False
+
+
+def test_helpers():
+    assert days_mask("MWF") == 0b10101
+    assert days_mask("TuTh") == 0b01010
+    assert days_mask(None) == 0
+    assert day_names(0b10101) == ["Monday", "Wednesday", "Friday"]
+    assert to_minutes("1900-01-01T09:30:00") == 570
+    assert to_minutes("17:05") == 1025
+    assert format_minutes(570) == "09:30"
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bitmap_matches_per_row_check(seed):
+    rng = random.Random(seed)
+    constraints = {
+        day: [(format_minutes(start), format_minutes(start + rng.choice([30, 60, 180])))
+              for start in rng.sample(range(6 * 60, 20 * 60, 30), rng.randint(0, 2))]
+        for day in DAY_NAMES
+    }
+    # also every boundary case: classes starting or ending exactly at a slot edge
+    starts = list(range(7 * 60, 21 * 60, 10))
+    sections = pd.DataFrame({
+        "days": [rng.randrange(1, 128) for _ in starts],
+        "start_min": starts,
+        "end_min": [start + rng.choice([50, 60, 80]) for start in starts],
+    })
+
+    mask = disallowed_sections(sections, compile_constraints(constraints))
+    expected = [
+        is_time_disallowed(format_minutes(start), format_minutes(end), day_names(days), constraints)
+        for days, start, end in zip(sections["days"], sections["start_min"], sections["end_min"])
+    ]
+    assert mask.tolist() == expected
+
+
+def test_malformed_slots_are_ignored():
+    blocked = compile_constraints({"Monday": [("09:00",), None, ("bad", "10:00")], "Someday": [("09:00", "10:00")]})
+    assert not blocked.any()
+
+
+def test_build_sections_table():
+    section_set = {"edges": [
+        {"node": {"id": "s1", "kind": "Lecture", "wordDays": "TuTh", "startTime": "1900-01-01T09:30:00",
+                  "endTime": "1900-01-01T11:00:00", "instructor": "Ada", "locationName": "Soda 306"}},
+        {"node": {"id": "s2", "wordDays": "F", "startTime": None, "endTime": None}},
+    ]}
+    courses = pd.DataFrame({"id": [1, 2, 3], "sectionSet": [json.dumps(section_set), str(section_set), None]})
+
+    table = build_sections_table(courses)
+    assert table["course_id"].tolist() == [1, 2]
+    assert table["section_id"].tolist() == ["s1", "s1"]
+    assert table[["days", "start_min", "end_min"]].values.tolist() == [[0b01010, 570, 660]] * 2
+    assert table["location"].tolist() == ["Soda 306"] * 2
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import catalog
+from bench.synthetic import synthetic_courses
+from catalog import CatalogCache
+from data.build_snapshot import build as build_snapshot
+from snapshot import load_snapshot, read_manifest
+
+
+def build(path, title):
+    courses = synthetic_courses(20, seed=1)
+    courses[0]["title"] = title
+    return build_snapshot(courses, str(path))
+
+
+def test_a_build_keeps_the_previous_builds_files(tmp_path):
+    first = build(tmp_path, "First")
+    second = build(tmp_path, "Second")
+    # a reader that read the first manifest just before the swap can still load it
+    assert load_snapshot(str(tmp_path), first)[1]["title"][0] == "First"
+
+    third = build(tmp_path, "Third")
+    files = set(os.listdir(tmp_path))
+    assert set(second["files"].values()) | set(third["files"].values()) <= files
+    assert not set(first["files"].values()) & files
+    assert read_manifest(str(tmp_path)) == third
+
+
+def test_refresh_rereads_a_manifest_whose_files_are_gone(tmp_path, monkeypatch):
+    stale = build(tmp_path, "First")
+    build(tmp_path, "Second")
+    build(tmp_path, "Third")
+    monkeypatch.setattr(catalog, "read_manifest", lambda snapshot_dir: stale)
+
+    snapshot = CatalogCache(None, snapshot_dir=str(tmp_path)).refresh()
+    assert snapshot.courses["title"][0] == "Third"
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from bench.stubs import keyword_embed as embed
+from vectorstores import NumpyStore, match_where
+
+
+def test_match_where():
+    columns = {
+        "id": np.array(["a", "b", "c", "d"], dtype=object),
+        "units": np.array([4, 3, None, 2], dtype=object),
+        "has_primary": np.array([True, True, False, True], dtype=object),
+    }
+    assert match_where({"has_primary": True}, columns, 4).tolist() == [True, True, False, True]
+    assert match_where({"units": {"$gte": 3}}, columns, 4).tolist() == [True, True, False, False]
+    assert match_where({"id": {"$nin": ["a", "d"]}}, columns, 4).tolist() == [False, True, True, False]
+    assert match_where({"$and": [{"has_primary": True}, {"id": {"$in": ["a", "c", "d"]}}]},
+                       columns, 4).tolist() == [True, False, False, True]
+    assert match_where({"$or": [{"id": "a"}, {"units": {"$lt": 3}}]}, columns, 4).tolist() == [True, False, False, True]
+    # a field no row has matches nothing
+    assert not match_where({"missing": 1}, columns, 4).any()
+
+
+def test_numpy_store_round_trip(tmp_path):
+    store = NumpyStore(str(tmp_path), "courses", embed)
+    store.upsert(["1", "2", "3"], ["machine learning", "world history", "art history"],
+                 [{"dept": "CS"}, {"dept": "HIST"}, {"dept": "ART"}])
+
+    results = store.query(embed(["learning"]), n_results=2)
+    assert results["ids"][0][0] == "1"
+    assert results["distances"][0][0] == pytest.approx(0, abs=1e-3)
+
+    results = store.query(embed(["history", "learning"]), n_results=3, where={"dept": {"$ne": "CS"}})
+    assert [set(ids) for ids in results["ids"]] == [{"2", "3"}, {"2", "3"}]
+
+    store.upsert(["2"], ["machine learning"], [{"dept": "CS"}])
+    store.delete(["1"])
+    # a second handle on the same directory (another worker) sees every write
+    other = NumpyStore(str(tmp_path), "courses", embed)
+    assert other.stored_metadata() == {"2": {"dept": "CS"}, "3": {"dept": "ART"}}
+
+    store.reset()
+    assert other.stored_metadata() == {}
+    assert other.query(embed(["art"]), n_results=2)["ids"] == [[]]
+
+
+def _write(path, worker):
+    store = NumpyStore(path, "courses", embed)
+    for i in range(10):
+        store.upsert([f"{worker}-{i}"], ["art"], [{"worker": worker}])
+
+
+def test_concurrent_writers_keep_every_update(tmp_path):
+    reader = NumpyStore(str(tmp_path), "courses", embed)
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_write, args=(str(tmp_path), worker)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert len(reader.stored_metadata()) == 30
+    assert sum(name.endswith(".npy") for name in os.listdir(tmp_path / "courses")) == 1
@@ -0,0 +1,299 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: NumpyStore writes are only serialized within a process
+    fcntl = None
+
+"""
+    vector store backends behind embeddings.py
+
+    Both keep one collection per (directory, name), embed documents with the
+    function they are given and answer in Chroma's result shape:
+    {"ids": [[...]], "metadatas": [[...]], "distances": [[...]]}, one inner
+    list per query vector, with squared L2 distances (lower is closer).
+"""
+
+
+class ChromaStore:
+    """A Chroma collection in a PersistentClient; suited to large catalogs."""
+
+    _clients = {}
+    _lock = threading.Lock()
+
+    def __init__(self, embeddings_dir: str, name: str, embedding_function):
+        self.client = self.get_client(embeddings_dir)
+        self.name = name
+        self.embedding_function = embedding_function
+        self._collection = None
+
+    @classmethod
+    def get_client(cls, embeddings_dir: str):
+        client = cls._clients.get(embeddings_dir)
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(embeddings_dir)
+                if client is None:
+                    import chromadb
+                    client = chromadb.PersistentClient(path=embeddings_dir)
+                    cls._clients[embeddings_dir] = client
+        return client
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = self.client.get_or_create_collection(
+                name=self.name,
+                embedding_function=self.embedding_function
+            )
+        return self._collection
+
+    def locked(self):
+        # writes go through Chroma's SQLite database, which serializes them
+        return contextlib.nullcontext()
+
+    def stored_metadata(self) -> dict:
+        existing = self.collection.get(include=["metadatas"])
+        return dict(zip(existing["ids"], existing["metadatas"]))
+
+    def upsert(self, ids: list[str], documents: list[str], metadatas: list[dict], embeddings=None):
+        # precomputed embeddings (e.g. from a parallel build) skip the embedding function
+        self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids: list[str]):
+        self.collection.delete(ids=ids)
+
+    def reset(self):
+        if self.name in [col.name for col in self.client.list_collections()]:
+            self.client.delete_collection(self.name)
+        self._collection = None
+
+    def query(self, vectors, n_results: int, where: dict = None) -> dict:
+        return self.collection.query(
+            query_embeddings=vectors,
+            n_results=n_results,
+            where=where,
+            include=["metadatas", "distances"]
+        )
+
+
+class NumpyStore:
+    """
+    Normalized embeddings in a float16 .npy matrix plus a meta.json file of
+    ids and metadata, for catalogs of a few thousand courses.
+
+    The matrix is memory-mapped, so loading takes milliseconds and the pages
+    are shared by every worker process. A query is one matrix product for
+    all query vectors, a metadata mask for `where`, and argpartition for the
+    top-K.
+
+    Several processes (e.g. gunicorn workers) can share one directory. Each
+    write saves the matrix under a new name and then atomically replaces
+    meta.json, which names it, so readers always see a consistent pair.
+    Writes hold an exclusive lock on the `lock` file and start from the
+    files on disk, and every read reloads if meta.json has changed, so no
+    process works from a stale copy or overwrites another's update.
+    """
+
+    def __init__(self, embeddings_dir: str, name: str, embedding_function):
+        self.path = os.path.join(embeddings_dir, name)
+        self.meta_path = os.path.join(self.path, "meta.json")
+        self.embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._loaded = None
+        self._load()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        # another process may replace meta.json and drop its matrix between our two reads
+        for _ in range(3):
+            signature = self._signature()
+            if signature is None:
+                meta = {"ids": [], "metadatas": []}
+                matrix = np.zeros((0, 0), dtype=np.float16)
+                break
+            try:
+                with open(self.meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                matrix = np.load(os.path.join(self.path, meta.get("vectors", "vectors.npy")), mmap_mode="r")
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            raise RuntimeError(f"{self.path} kept changing while it was being loaded")
+        # swapped as a whole, so a concurrent query sees either the old or the new index
+        self._index = (matrix, meta["ids"], meta["metadatas"], self._columns(meta["metadatas"]))
+        self._vectors_file = meta.get("vectors", "vectors.npy")
+        self._loaded = signature
+
+    def _refresh(self):
+        if self._signature() != self._loaded:
+            with self._lock:
+                if self._signature() != self._loaded:
+                    self._load()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Exclusive access to the store across threads and processes, with the
+        index reloaded from disk; re-entrant, so sync_embeddings can hold it
+        around its diff and writes.
+        """
+        with self._lock:
+            if self._lock_depth == 0:
+                os.makedirs(self.path, exist_ok=True)
+                self._lock_file = open(os.path.join(self.path, "lock"), "a")
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    # closing the file releases the flock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    @staticmethod
+    def _columns(metadatas: list[dict]) -> dict:
+        fields = {field for metadata in metadatas for field in metadata}
+        return {field: np.array([metadata.get(field) for metadata in metadatas], dtype=object) for field in fields}
+
+    def _save(self, matrix: np.ndarray, ids: list[str], metadatas: list[dict]):
+        # called with the lock held; unique temp names, in case another process writes too
+        fd, vectors_path = tempfile.mkstemp(dir=self.path, prefix="vectors-", suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix.astype(np.float16))
+        fd, meta_tmp = tempfile.mkstemp(dir=self.path, prefix="meta-", suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"vectors": os.path.basename(vectors_path), "ids": ids, "metadatas": metadatas}, f)
+        os.replace(meta_tmp, self.meta_path)
+        # readers that already mapped the old matrix keep their mapping
+        self._remove_vectors(self._vectors_file)
+        self._load()
+
+    def _remove_vectors(self, file_name: str):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(self.path, file_name))
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def stored_metadata(self) -> dict:
+        self._refresh()
+        _, ids, metadatas, _ = self._index
+        return dict(zip(ids, metadatas))
+
+    def upsert(self, ids: list[str], documents: list[str], metadatas: list[dict], embeddings=None):
+        vectors = self._normalize(self.embedding_function(documents) if embeddings is None else embeddings)
+        with self.locked():
+            matrix, stored_ids, stored_metadatas, _ = self._index
+            matrix = np.array(matrix, dtype=np.float32) if len(stored_ids) else vectors[:0]
+            stored_ids, stored_metadatas = list(stored_ids), list(stored_metadatas)
+            positions = {stored_id: p for p, stored_id in enumerate(stored_ids)}
+
+            new_rows = []
+            for i, row_id in enumerate(ids):
+                if row_id in positions:
+                    matrix[positions[row_id]] = vectors[i]
+                    stored_metadatas[positions[row_id]] = metadatas[i]
+                else:
+                    new_rows.append(i)
+                    stored_ids.append(row_id)
+                    stored_metadatas.append(metadatas[i])
+            matrix = np.vstack([matrix, vectors[new_rows]])
+            self._save(matrix, stored_ids, stored_metadatas)
+
+    def delete(self, ids: list[str]):
+        with self.locked():
+            matrix, stored_ids, stored_metadatas, _ = self._index
+            removed = set(ids)
+            keep = [p for p, stored_id in enumerate(stored_ids) if stored_id not in removed]
+            self._save(np.asarray(matrix)[keep], [stored_ids[p] for p in keep],
+                       [stored_metadatas[p] for p in keep])
+
+    def reset(self):
+        with self.locked():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.meta_path)
+            self._remove_vectors(self._vectors_file)
+            self._load()
+
+    def query(self, vectors, n_results: int, where: dict = None) -> dict:
+        self._refresh()
+        matrix, ids, metadatas, columns = self._index
+        queries = self._normalize(vectors)
+        results = {"ids": [], "metadatas": [], "distances": []}
+        if not ids:
+            for _ in queries:
+                for key in results:
+                    results[key].append([])
+            return results
+
+        # (n, q) cosine similarities; squared L2 between unit vectors is 2 - 2cos
+        similarity = np.asarray(matrix, dtype=np.float32) @ queries.T
+        candidates = np.flatnonzero(match_where(where, columns, len(ids))) if where else np.arange(len(ids))
+        k = min(n_results, len(candidates))
+
+        for q in range(len(queries)):
+            scores = similarity[candidates, q]
+            top = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=int)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            rows = candidates[top]
+            results["ids"].append([ids[row] for row in rows])
+            results["metadatas"].append([metadatas[row] for row in rows])
+            results["distances"].append([float(2 - 2 * s) for s in scores[top]])
+        return results
+
+
+"""
+    Chroma-style `where` clauses over metadata columns, for NumpyStore
+"""
+COMPARISONS = {
+    "$eq": lambda column, value: column == value,
+    "$ne": lambda column, value: column != value,
+    "$gt": lambda column, value: np.array([v is not None and v > value for v in column], dtype=bool),
+    "$gte": lambda column, value: np.array([v is not None and v >= value for v in column], dtype=bool),
+    "$lt": lambda column, value: np.array([v is not None and v < value for v in column], dtype=bool),
+    "$lte": lambda column, value: np.array([v is not None and v <= value for v in column], dtype=bool),
+    "$in": lambda column, value: np.isin(column, list(value)),
+    "$nin": lambda column, value: ~np.isin(column, list(value)),
+}
+
+
+def match_where(where: dict, columns: dict, n: int) -> np.ndarray:
+    mask = np.ones(n, dtype=bool)
+    for key, condition in where.items():
+        if key == "$and":
+            for clause in condition:
+                mask &= match_where(clause, columns, n)
+        elif key == "$or":
+            mask &= np.logical_or.reduce([match_where(clause, columns, n) for clause in condition])
+        else:
+            column = columns.get(key, np.full(n, None, dtype=object))
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, value in condition.items():
+                mask &= np.asarray(COMPARISONS[operator](column, value), dtype=bool)
+    return mask
+
+
+VECTOR_STORES = {"chroma": ChromaStore, "numpy": NumpyStore}
@@ -102,7 +102,8 @@ export default function App() {
     setSchedules([]);
 
     try {
-      const response = await fetch("http://172.20.10.3:5000/api/schedule", {
+      // streamed as one JSON event per line; first schedules show up before the final picks
+      const response = await fetch("http://172.20.10.3:5000/api/schedule/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json"
@@ -114,10 +115,33 @@ export default function App() {
         throw new Error(`API error: ${response.statusText}`);
       }
 
-      const data = await response.json();
-      if (data && data.combinations) {
-        setSchedules(data.combinations);
-      } else {
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let gotCombinations = false;
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const { event, data } = JSON.parse(line);
+          if (event === "schedules") {
+            if (!gotCombinations) setSchedules(data.schedules);
+          } else if (event === "combinations") {
+            gotCombinations = true;
+            setSchedules(data.combinations);
+          } else if (event === "error") {
+            throw new Error(data.error);
+          }
+        }
+      }
+
+      if (!gotCombinations) {
         console.error("No combinations returned from API.");
       }
     } catch (error) {
@@ -189,7 +213,7 @@ export default function App() {
       <div className="App">
         <h1>Sample Schedules</h1>
 
-        {generating ? (
+        {generating && schedules.length === 0 ? (
           <p className="spinner">Generating schedules... (this may take ~30 seconds)</p>
         ) : schedules.length > 0 ? (
           <div className="scroll-container">